@@ -1,64 +1,505 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import brotli
+import csv
+import functools
+import inspect
+import hashlib
+import io
+import json
 import uuid
+import time
+import zlib
 from datetime import datetime, timezone, timedelta
 import jwt
+import numpy as np
+import orjson
 from passlib.context import CryptContext
 from bson import ObjectId
+from bson.errors import InvalidId
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
+def fast_json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"{type(value).__name__} JSON'a dönüştürülemiyor")
+
+def dumps_json(content) -> bytes:
+    """orjson encoding; datetimes become ISO 8601 strings, ObjectIds strings"""
+    return orjson.dumps(content, default=fast_json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+def fast_json_endpoint(endpoint, status_code: Optional[int]):
+    """Wrap an endpoint so its return value goes straight to FastJSONResponse"""
+    signature = inspect.signature(endpoint)
+    parameters = list(signature.parameters.values())
+    # FastAPI tek bir Response parametresi tanır; uç nokta zaten istiyorsa o kullanılır
+    existing = next((p.name for p in parameters if p.annotation is Response), None)
+    response_name = existing or "fast_json_response"
+    if existing is None:
+        parameters.append(inspect.Parameter(response_name, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+    
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        sub_response = kwargs[response_name] if existing else kwargs.pop(response_name)
+        if inspect.iscoroutinefunction(endpoint):
+            content = await endpoint(*args, **kwargs)
+        else:
+            content = await run_in_threadpool(endpoint, *args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        response = FastJSONResponse(content, status_code=sub_response.status_code or status_code or 200)
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
+    
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+class FastJSONRoute(APIRoute):
+    """Route that encodes plain return values once, with orjson"""
+    def __init__(self, path: str, endpoint, *, response_model=Default(None), status_code: Optional[int] = None, **kwargs):
+        if (
+            isinstance(response_model, DefaultPlaceholder)
+            and response_model.value is None
+            and inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+        ):
+            endpoint = fast_json_endpoint(endpoint, status_code)
+        super().__init__(path, endpoint, response_model=response_model, status_code=status_code, **kwargs)
+
 app = FastAPI()
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=FastJSONRoute, default_response_class=FastJSONResponse)
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+# bcrypt GIL'i bıraktığı için sınırlı bir thread havuzu event loop'u bloklamadan yeterli olur
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 security = HTTPBearer()
 
 SECRET_KEY = os.environ.get('JWT_SECRET', 'fethmes-secret-key-2025')
 ALGORITHM = "HS256"
 
+# auto: replica set / mongos algılanırsa transaction kullan; on / off: zorla
+MONGO_TRANSACTIONS = os.environ.get('MONGO_TRANSACTIONS', 'auto')
+transactions_supported = False
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600)))
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = 60
+
+MAX_WORK_LOG_BATCH = int(os.environ.get('MAX_WORK_LOG_BATCH', '500'))
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+# Bu boyuttan küçük yanıtlar (sık sorgulanan küçük listeler, 304'ler) sıkıştırılmaz
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_COMPRESS_LEVEL = int(os.environ.get('GZIP_COMPRESS_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '4'))
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Sayfalamasız liste isteklerinin üst sınırı (eski 1000 kayıt sınırı)
+LIST_RESPONSE_LIMIT = int(os.environ.get('LIST_RESPONSE_LIMIT', '1000'))
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '1000'))
+REPORT_CACHE_TODAY_TTL_SECONDS = float(os.environ.get('REPORT_CACHE_TODAY_TTL_SECONDS', '30'))
+# Gün parçaları da bu önbellekte tutulur; çeyreklik bir rapor ~90 kayıt kullanır
+REPORT_CACHE_MAX_SIZE = int(os.environ.get('REPORT_CACHE_MAX_SIZE', '1024'))
+# Uzun aralıklar bu kadar günlük parçalara bölünür ve en fazla bu kadarı aynı anda sorgulanır
+REPORT_CHUNK_DAYS = int(os.environ.get('REPORT_CHUNK_DAYS', '1'))
+REPORT_FANOUT_CONCURRENCY = int(os.environ.get('REPORT_FANOUT_CONCURRENCY', '4'))
+
+class TTLCache:
+    """Process-local LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_QUEUE_SIZE = 256
+# EventSource başlık gönderemez; URL'deki token erişim loglarına düşeceği için kısa ömürlüdür
+STREAM_TOKEN_TTL_SECONDS = int(os.environ.get('STREAM_TOKEN_TTL_SECONDS', '60'))
+STREAM_TOKEN_SCOPE = "event_stream"
+
+class EventBroker:
+    """In-process fan-out of state change events to server-sent event subscribers"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in list(self.subscribers):
+            if queue.full():
+                # Yavaş istemci: en eski olay düşürülür, istemci zaten tam durumu yeniden çeker
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+event_broker = EventBroker(SSE_QUEUE_SIZE)
+
+# Her yazma işlemi ilgili koleksiyonun sürümünü artırır; ETag'ler bu sayaçlardan üretilir
+VERSIONS_DOC_ID = "collection_versions"
+
+async def get_versions() -> dict:
+    doc = await db.meta.find_one({"_id": VERSIONS_DOC_ID})
+    return {k: v for k, v in (doc or {}).items() if k != "_id"}
+
+def versions_update(*collections: str) -> UpdateOne:
+    return UpdateOne({"_id": VERSIONS_DOC_ID}, {"$inc": {name: 1 for name in collections}}, upsert=True)
+
+async def bump_versions(*collections: str):
+    """Call after the write has completed, never before"""
+    await db.meta.bulk_write([versions_update(*collections)])
+
+REPORT_DAYS_DOC_ID = "report_day_versions"
+
+def report_days_update(days) -> Optional[UpdateOne]:
+    """Bump the versions of the closed (before today) days among `days`"""
+    today = start_of_day(datetime.now(timezone.utc))
+    past = sorted({day.date().isoformat() for day in days if day < today})
+    if not past:
+        return None
+    return UpdateOne({"_id": REPORT_DAYS_DOC_ID}, {"$inc": {f"days.{day}": 1 for day in past}}, upsert=True)
+
+def plan_meta_updates(collections, rollup_days) -> list:
+    updates = [versions_update(*collections)]
+    days_update = report_days_update(rollup_days)
+    if days_update is not None:
+        updates.append(days_update)
+    return updates
+
+async def load_report_days() -> dict:
+    return await db.meta.find_one({"_id": REPORT_DAYS_DOC_ID}) or {}
+
+def report_days_signature(doc: dict, start: datetime, end: datetime) -> tuple:
+    """Changes whenever a write touches a day in [start, end] or the rollups are rebuilt"""
+    first, last = start.date().isoformat(), end.date().isoformat()
+    return doc.get("generation", 0), sum(v for day, v in doc.get("days", {}).items() if first <= day <= last)
+
+async def cached_report(name: str, params: dict, start: datetime, end: datetime, build, report_days: Optional[dict] = None):
+    """Serve a report from report_cache, rebuilding it when its days changed"""
+    # Kapalı aralıklar günlerinden biri değişene kadar, bugünü içerenler kısa TTL ile tutulur
+    closed = end < start_of_day(datetime.now(timezone.utc))
+    # İmza hesaplamadan önce okunur; hesaplama sırasında gelen yazma bir sonraki istekte fark edilir.
+    # Eski imzalı kayıtlar bir daha okunmaz ve LRU ile düşer.
+    signature = None
+    if closed:
+        signature = report_days_signature(report_days if report_days is not None else await load_report_days(), start, end)
+    key = (name, tuple(sorted(params.items())), signature)
+    report = report_cache.get(key)
+    if report is None:
+        report = await build()
+        report_cache.set(key, report, None if closed else REPORT_CACHE_TODAY_TTL_SECONDS)
+    return report
+
+def report_chunks(start: datetime, end: datetime) -> list:
+    """Split [start, end) into REPORT_CHUNK_DAYS-long (start, end) pairs"""
+    chunks = []
+    # Sınırlar start'a değil sabit gün numaralarına hizalı; örtüşen aralıklar aynı parçaları (ve önbellek kayıtlarını) paylaşır
+    day = start_of_day(start)
+    day -= timedelta(days=day.toordinal() % REPORT_CHUNK_DAYS)
+    while day < end:
+        chunk_end = day + timedelta(days=REPORT_CHUNK_DAYS)
+        chunks.append((max(day, start), min(chunk_end, end)))
+        day = chunk_end
+    return chunks
+
+async def chunked_report(name: str, params: dict, start: datetime, end: datetime, compute) -> list:
+    """Run compute(chunk_start, chunk_end) for every chunk of [start, end) and return the partials in order"""
+    semaphore = asyncio.Semaphore(REPORT_FANOUT_CONCURRENCY)
+    today = start_of_day(datetime.now(timezone.utc))
+    chunks = report_chunks(start, end)
+    # Gün sürümleri parça başına değil istek başına bir kez okunur
+    report_days = await load_report_days() if chunks and chunks[0][0] < today else None
+    
+    async def run(chunk_start: datetime, chunk_end: datetime):
+        # Bugünün parçası 'now' ile kırpılır; anahtarı gün sınırıyla kurulur ki her istekte yeni kayıt açılmasın
+        key_end = chunk_end if chunk_end <= today else start_of_day(chunk_end) + timedelta(days=1)
+        async with semaphore:
+            chunk_params = {**params, "chunk_start": chunk_start.isoformat(), "chunk_end": key_end.isoformat()}
+            return await cached_report(
+                name, chunk_params, chunk_start, chunk_end - timedelta(microseconds=1),
+                lambda: compute(chunk_start, chunk_end), report_days
+            )
+    
+    return await asyncio.gather(*(run(chunk_start, chunk_end) for chunk_start, chunk_end in chunks))
+
+LIVE_TASK_STATUSES = ["preparation", "in_progress", "paused"]
+LIVE_SNAPSHOT_POLL_SECONDS = float(os.environ.get('LIVE_SNAPSHOT_POLL_SECONDS', '5'))
+LIVE_STATUS_RECENT_LOGS = 20
+
+def summarise_task_logs(logs: list) -> dict:
+    """Current phase start and accumulated pause time from a task's logs sorted by timestamp"""
+    started_at = None
+    paused_since = None
+    pause_seconds = 0.0
+    for log in logs:
+        timestamp = parse_timestamp(log["timestamp"])
+        if started_at is None and log["event_type"] in ("prep_start", "work_start"):
+            started_at = timestamp
+        if log["event_type"] == "work_pause":
+            paused_since = timestamp
+        elif paused_since is not None and log["event_type"] in ("work_resume", "work_complete"):
+            pause_seconds += (timestamp - paused_since).total_seconds()
+            paused_since = None
+    last = logs[-1] if logs else None
+    return {
+        "started_at": started_at,
+        "phase_started_at": parse_timestamp(last["timestamp"]) if last else None,
+        "last_event_type": last["event_type"] if last else None,
+        "paused_since": paused_since,
+        "pause_reason": last.get("pause_reason") if last and paused_since is not None else None,
+        "pause_seconds": round(pause_seconds, 1)
+    }
+
+async def build_live_status(machine_query: dict) -> list:
+    """Join machines with their active task, worker and work order using batched $in lookups"""
+    machines = await db.machines.find(machine_query, {"_id": 0}).to_list(None)
+    task_ids = [m["current_task_id"] for m in machines if m.get("current_task_id")]
+    tasks = await db.tasks.find({"id": {"$in": task_ids}, "status": {"$in": LIVE_TASK_STATUSES}}, {"_id": 0}).to_list(None)
+    tasks_by_id = {t["id"]: t for t in tasks}
+    
+    # Makine sayısından bağımsız olarak iş emri ve operatörler tek $in sorgusuyla alınır
+    active = [(m, tasks_by_id[m["current_task_id"]]) for m in machines if m.get("current_task_id") in tasks_by_id]
+    work_order_ids = list({task["work_order_id"] for _, task in active})
+    worker_ids = list({m["current_worker_id"] for m, _ in active if m.get("current_worker_id")})
+    work_orders, workers, logs = await asyncio.gather(
+        db.work_orders.find({"id": {"$in": work_order_ids}}, {"_id": 0}).to_list(None),
+        db.users.find({"id": {"$in": worker_ids}}, {"_id": 0, "password_hash": 0}).to_list(None),
+        # Tüm aktif görevlerin logları task_id + timestamp index'iyle tek sorguda
+        db.work_logs.find({"task_id": {"$in": list(tasks_by_id)}}, {"_id": 0}).sort([("task_id", ASCENDING), ("timestamp", ASCENDING)]).to_list(None)
+    )
+    work_orders_by_id = {w["id"]: w for w in work_orders}
+    workers_by_id = {u["id"]: u for u in workers}
+    logs_by_task = {}
+    for log in logs:
+        logs_by_task.setdefault(log["task_id"], []).append(log)
+    
+    machine_status = []
+    for machine in machines:
+        task_info = tasks_by_id.get(machine.get("current_task_id"))
+        worker_info = None
+        work_order_info = None
+        timing = None
+        task_logs = []
+        if task_info:
+            work_order_info = work_orders_by_id.get(task_info["work_order_id"])
+            if machine.get("current_worker_id"):
+                worker_info = workers_by_id.get(machine["current_worker_id"])
+            task_logs = logs_by_task.get(task_info["id"], [])
+            timing = summarise_task_logs(task_logs)
+        
+        machine_status.append({
+            "machine": machine,
+            "task": task_info,
+            "worker": worker_info,
+            "work_order": work_order_info,
+            "timing": timing,
+            "logs": task_logs[-LIVE_STATUS_RECENT_LOGS:]
+        })
+    return machine_status
+
+class LiveStatusSnapshot:
+    """Process-local copy of the /dashboard/live-status view"""
+
+    def __init__(self):
+        self.entries = {}
+        self.content_hash = ""
+        self.ready = False
+        self._lock = asyncio.Lock()
+        self._background = set()
+
+    async def rebuild(self) -> bool:
+        async with self._lock:
+            entries = {e["machine"]["id"]: e for e in await build_live_status({})}
+            changed = entries != self.entries
+            self.entries = entries
+            self._update_content_hash()
+            self.ready = True
+            return changed
+
+    async def refresh(self, machine_ids):
+        machine_ids = list(set(machine_ids))
+        async with self._lock:
+            found = {e["machine"]["id"]: e for e in await build_live_status({"id": {"$in": machine_ids}})}
+            for machine_id in machine_ids:
+                if machine_id in found:
+                    self.entries[machine_id] = found[machine_id]
+                else:
+                    self.entries.pop(machine_id, None)
+            self._update_content_hash()
+
+    def _update_content_hash(self):
+        # ETag içeriğe göre üretilir: aynı görünüme sahip tüm worker süreçleri aynı ETag'i verir
+        payload = json.dumps(list(self.entries.values()), default=str, sort_keys=True)
+        self.content_hash = hashlib.sha1(payload.encode()).hexdigest()
+
+    def schedule_refresh(self, machine_ids, events=()):
+        """Refresh machines in the background, then publish the events to SSE subscribers"""
+        async def run():
+            try:
+                await self.refresh(machine_ids)
+            except Exception as e:
+                logger.error(f"Canlı durum güncellenemedi: {e}")
+            for event in events:
+                event_broker.publish(event)
+        task = asyncio.create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def machine_ids_referencing(self, work_order_id: Optional[str] = None, worker_id: Optional[str] = None) -> List[str]:
+        return [
+            machine_id for machine_id, entry in self.entries.items()
+            if (work_order_id and entry["machine"].get("current_work_order_id") == work_order_id)
+            or (worker_id and entry["machine"].get("current_worker_id") == worker_id)
+        ]
+
+    def list(self) -> list:
+        return list(self.entries.values())
+
+live_snapshot = LiveStatusSnapshot()
+
+# Her istekte Mongo'ya gitmemek için doğrulanmış kullanıcılar kısa süre bellekte tutulur.
+# Diğer worker süreçlerindeki silme/güncellemeler watch_live_snapshot ile önbelleği temizler.
+user_cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE)
+# Bugünü içermeyen aralıklar süresiz tutulur; geçerliliği gün sürümleriyle kontrol edilir
+report_cache = TTLCache(float("inf"), REPORT_CACHE_MAX_SIZE)
+
 def serialize_doc(doc):
-    """Convert MongoDB document to JSON-serializable format"""
+    """Drop MongoDB's _id; ObjectId and datetime values are left to dumps_json"""
     if doc is None:
         return None
     if isinstance(doc, list):
         return [serialize_doc(item) for item in doc]
     if isinstance(doc, dict):
-        result = {}
-        for key, value in doc.items():
-            if key == '_id':
-                continue  # Skip MongoDB _id field
-            elif isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, datetime):
-                result[key] = value.isoformat()
-            elif isinstance(value, dict):
-                result[key] = serialize_doc(value)
-            elif isinstance(value, list):
-                result[key] = serialize_doc(value)
-            else:
-                result[key] = value
-        return result
+        return {key: value for key, value in doc.items() if key != '_id'}
     return doc
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify, plain_password, hashed_password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def parse_timestamp(value) -> datetime:
+    """Return an aware UTC datetime for a BSON date or a legacy ISO string"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    # Ofsetli değerler UTC'ye çevrilir; gün sınırları (rollup günleri, tarih aralıkları) UTC'dir
+    return value.astimezone(timezone.utc)
+
+def date_range_filter(field: str, start_date: Optional[str], end_date: Optional[str]) -> dict:
+    """Build an inclusive day-range filter on a datetime field"""
+    bounds = {}
+    if start_date:
+        bounds["$gte"] = parse_timestamp(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
+    if end_date:
+        bounds["$lte"] = parse_timestamp(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
+    return {field: bounds} if bounds else {}
+
+async def find_page(collection, query: dict, projection: dict, limit: Optional[int] = None, after: Optional[str] = None):
+    """Keyset pagination over _id"""
+    if limit is None and after is None:
+        docs = await collection.find(query, projection).sort("_id", ASCENDING).limit(LIST_RESPONSE_LIMIT + 1).to_list(LIST_RESPONSE_LIMIT + 1)
+        # Liste sessizce kesilmez; istemci sayfalamaya yönlendirilir
+        if len(docs) > LIST_RESPONSE_LIMIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sonuç {LIST_RESPONSE_LIMIT} kaydı aşıyor; limit ve after parametreleriyle sayfalayın"
+            )
+        return docs
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    if after is not None:
+        try:
+            query = {**query, "_id": {"$gt": ObjectId(after)}}
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+    page_projection = {k: v for k, v in projection.items() if k != "_id"}
+    docs = await collection.find(query, page_projection or None).sort("_id", ASCENDING).limit(limit + 1).to_list(limit + 1)
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    items = []
+    for doc in docs[:limit]:
+        doc.pop("_id", None)
+        items.append(doc)
+    return {"items": items, "next_cursor": next_cursor}
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -67,13 +508,30 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+    return await get_user_from_token(credentials.credentials)
+
+def create_stream_token(user_id: str) -> str:
+    """Short-lived token for the event stream, which can only pass it in the URL"""
+    expire = datetime.now(timezone.utc) + timedelta(seconds=STREAM_TOKEN_TTL_SECONDS)
+    return jwt.encode({"user_id": user_id, "scope": STREAM_TOKEN_SCOPE, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+async def load_user(user_id: str) -> Optional[dict]:
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        if user is None:
+            return None
+        user_cache.set(user_id, user)
+    return dict(user)
+
+async def get_user_from_token(token: str, scope: Optional[str] = None):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
-        if user_id is None:
+        # Akış token'ı API'de, oturum token'ı akışta geçmez
+        if user_id is None or payload.get("scope") != scope:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = await load_user(user_id)
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -82,6 +540,37 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    # 304 yanıtı gövde taşımamalı; HTTPException JSON gövdesi eklerdi
+    return Response(status_code=304, headers={"ETag": exc.etag})
+
+def make_etag(request: Request, state: str) -> str:
+    key = f"{request.url.path}?{request.url.query}|{state}"
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+def collection_etag(*collections: str):
+    """Dependency answering 304 when none of the collections changed since the client's ETag"""
+    async def dependency(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+        versions = await get_versions()
+        etag = make_etag(request, ",".join(f"{name}:{versions.get(name, 0)}" for name in collections))
+        if etag_matches(request, etag):
+            raise NotModified(etag)
+        response.headers["ETag"] = etag
+        # Tarayıcı önbelleği her istekte ETag ile doğrulasın
+        response.headers["Cache-Control"] = "no-cache"
+    return dependency
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -116,6 +605,10 @@ class UserResponse(BaseModel):
     role: str
     created_at: datetime
 
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
 class Machine(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -144,6 +637,9 @@ class WorkOrder(BaseModel):
     quantity: int
     description: Optional[str] = None
     status: Literal["pending", "assigned", "in_progress", "completed", "cancelled"] = "pending"
+    open_task_count: int = 0
+    completed_task_count: int = 0
+    completed_quantity: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     created_by: str
 
@@ -164,6 +660,8 @@ class Task(BaseModel):
     quantity_assigned: int
     quantity_completed: int = 0
     assigned_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_event_at: Optional[datetime] = None
+    pause_reason: Optional[str] = None
 
 class TaskCreate(BaseModel):
     work_order_id: str
@@ -189,22 +687,76 @@ class WorkLogCreate(BaseModel):
     quantity_completed: Optional[int] = None
     notes: Optional[str] = None
 
+class WorkLogBatchItem(WorkLogCreate):
+    timestamp: Optional[datetime] = None  # Tabletin olayı kaydettiği an; yoksa sunucu zamanı
+
+def request_fingerprint(payload) -> str:
+    if isinstance(payload, list):
+        data = [item.model_dump(mode="json") for item in payload]
+    else:
+        data = payload.model_dump(mode="json")
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+async def run_idempotent(key: Optional[str], scope: str, payload, handler):
+    """Run handler() once per (scope, key) and replay its stored response on retries"""
+    if not key:
+        return await handler()
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key en fazla 255 karakter olabilir")
+
+    fingerprint = request_fingerprint(payload)
+    now = datetime.now(timezone.utc)
+    record_filter = {"scope": scope, "key": key}
+    try:
+        await db.idempotency_keys.insert_one({**record_filter, "fingerprint": fingerprint, "status": "pending", "created_at": now})
+    except DuplicateKeyError:
+        existing = await db.idempotency_keys.find_one(record_filter, {"_id": 0})
+        if existing is None:
+            raise HTTPException(status_code=409, detail="İstek işleniyor, lütfen tekrar deneyin")
+        if existing["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key farklı bir istekle kullanılmış")
+        if existing["status"] == "completed":
+            return existing["response"]
+        # Yarım kalmış (ör. süreç çöktü) rezervasyon zaman aşımından sonra devralınır
+        stale_before = now - timedelta(seconds=IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+        takeover = await db.idempotency_keys.update_one(
+            {**record_filter, "status": "pending", "created_at": {"$lt": stale_before}},
+            {"$set": {"created_at": now}}
+        )
+        if takeover.modified_count == 0:
+            raise HTTPException(status_code=409, detail="İstek işleniyor, lütfen tekrar deneyin")
+
+    try:
+        response = await handler()
+    except Exception:
+        await db.idempotency_keys.delete_one({**record_filter, "status": "pending"})
+        raise
+    # JSON biçiminde saklanır; BSON tarihleri milisaniyeye kırpar ve tekrar yanıtı farklı olurdu
+    stored = orjson.loads(dumps_json(response))
+    await db.idempotency_keys.update_one(record_filter, {"$set": {"status": "completed", "response": stored}})
+    return response
+
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(login_data: LoginRequest):
     user = await db.users.find_one({"username": login_data.username}, {"_id": 0})
-    if not user or not verify_password(login_data.password, user["password_hash"]):
+    if not user or not await verify_password(login_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Kullanıcı adı veya şifre hatalı")
     
     token = create_access_token({"user_id": user["id"], "role": user["role"]})
     user_response = {k: v for k, v in user.items() if k != "password_hash"}
     return {"token": token, "user": user_response}
 
-@api_router.get("/users", response_model=List[UserResponse])
-async def get_users(current_user: dict = Depends(get_current_user)):
+@api_router.get("/users", response_model=Union[List[UserResponse], UserPage])
+async def get_users(
+    role: Optional[Literal["admin", "supervisor", "worker"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return users
+    query = {"role": role} if role else {}
+    return await find_page(db.users, query, {"_id": 0, "password_hash": 0}, limit, after)
 
 @api_router.post("/users", response_model=UserResponse)
 async def create_user(user_data: UserCreate, current_user: dict = Depends(get_current_user)):
@@ -217,17 +769,15 @@ async def create_user(user_data: UserCreate, current_user: dict = Depends(get_cu
     
     user = User(
         username=user_data.username,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role
     )
     doc = user.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.users.insert_one(doc)
+    await bump_versions("users")
     
     response_dict = {k: v for k, v in doc.items() if k != "password_hash"}
-    if isinstance(response_dict["created_at"], str):
-        response_dict["created_at"] = datetime.fromisoformat(response_dict["created_at"])
     return response_dict
 
 @api_router.put("/users/{user_id}", response_model=UserResponse)
@@ -237,18 +787,20 @@ async def update_user(user_id: str, user_data: UserUpdate, current_user: dict =
     
     update_dict = {k: v for k, v in user_data.model_dump().items() if v is not None}
     if "password" in update_dict:
-        update_dict["password_hash"] = hash_password(update_dict.pop("password"))
+        update_dict["password_hash"] = await hash_password(update_dict.pop("password"))
     
     if not update_dict:
         raise HTTPException(status_code=400, detail="Güncellenecek veri yok")
     
     result = await db.users.update_one({"id": user_id}, {"$set": update_dict})
+    user_cache.pop(user_id)
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+    await bump_versions("users")
+    live_snapshot.schedule_refresh(live_snapshot.machine_ids_referencing(worker_id=user_id))
     
     user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
-    if isinstance(user["created_at"], str):
-        user["created_at"] = datetime.fromisoformat(user["created_at"])
+    user["created_at"] = parse_timestamp(user["created_at"])
     return user
 
 @api_router.delete("/users/{user_id}")
@@ -257,14 +809,28 @@ async def delete_user(user_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
     result = await db.users.delete_one({"id": user_id})
+    user_cache.pop(user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+    await bump_versions("users")
+    live_snapshot.schedule_refresh(live_snapshot.machine_ids_referencing(worker_id=user_id))
     return {"message": "Kullanıcı silindi"}
 
-@api_router.get("/machines")
-async def get_machines(current_user: dict = Depends(get_current_user)):
-    machines = await db.machines.find({}, {"_id": 0}).to_list(1000)
-    return machines
+@api_router.get("/system/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Yetkiniz yok")
+    return {"user_cache": user_cache.stats(), "report_cache": report_cache.stats()}
+
+@api_router.get("/machines", dependencies=[Depends(collection_etag("machines"))])
+async def get_machines(
+    status: Optional[Literal["idle", "running", "stopped", "pause"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    query = {"status": status} if status else {}
+    return await find_page(db.machines, query, {"_id": 0}, limit, after)
 
 @api_router.post("/machines")
 async def create_machine(machine_data: MachineCreate, current_user: dict = Depends(get_current_user)):
@@ -277,9 +843,11 @@ async def create_machine(machine_data: MachineCreate, current_user: dict = Depen
     
     machine = Machine(**machine_data.model_dump())
     doc = machine.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.machines.insert_one(doc)
-    return serialize_doc(doc)
+    await bump_versions("machines")
+    response = serialize_doc(doc)
+    live_snapshot.schedule_refresh([doc["id"]], [{"type": "machine_created", "machine": response}])
+    return response
 
 @api_router.put("/machines/{machine_id}")
 async def update_machine(machine_id: str, machine_data: MachineUpdate, current_user: dict = Depends(get_current_user)):
@@ -293,8 +861,10 @@ async def update_machine(machine_id: str, machine_data: MachineUpdate, current_u
     result = await db.machines.update_one({"id": machine_id}, {"$set": update_dict})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Makine bulunamadı")
+    await bump_versions("machines")
     
     machine = await db.machines.find_one({"id": machine_id}, {"_id": 0})
+    live_snapshot.schedule_refresh([machine_id], [{"type": "machine_updated", "machine": serialize_doc(machine)}])
     return machine
 
 @api_router.delete("/machines/{machine_id}")
@@ -305,12 +875,26 @@ async def delete_machine(machine_id: str, current_user: dict = Depends(get_curre
     result = await db.machines.delete_one({"id": machine_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Makine bulunamadı")
+    await bump_versions("machines")
+    live_snapshot.schedule_refresh([machine_id], [{"type": "machine_deleted", "machine": {"id": machine_id}}])
     return {"message": "Makine silindi"}
 
-@api_router.get("/work-orders")
-async def get_work_orders(current_user: dict = Depends(get_current_user)):
-    work_orders = await db.work_orders.find({}, {"_id": 0}).to_list(1000)
-    return work_orders
+@api_router.get("/work-orders", dependencies=[Depends(collection_etag("work_orders"))])
+async def get_work_orders(
+    status: Optional[Literal["pending", "assigned", "in_progress", "completed", "cancelled"]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        query = date_range_filter("created_at", start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if status:
+        query["status"] = status
+    return await find_page(db.work_orders, query, {"_id": 0}, limit, after)
 
 @api_router.post("/work-orders")
 async def create_work_order(order_data: WorkOrderCreate, current_user: dict = Depends(get_current_user)):
@@ -319,8 +903,8 @@ async def create_work_order(order_data: WorkOrderCreate, current_user: dict = De
     
     work_order = WorkOrder(**order_data.model_dump(), created_by=current_user["id"])
     doc = work_order.model_dump()
-    doc["created_at"] = doc["created_at"].isoformat()
     await db.work_orders.insert_one(doc)
+    await bump_versions("work_orders")
     return serialize_doc(doc)
 
 @api_router.delete("/work-orders/{order_id}")
@@ -331,40 +915,76 @@ async def delete_work_order(order_id: str, current_user: dict = Depends(get_curr
     result = await db.work_orders.delete_one({"id": order_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="İş emri bulunamadı")
+    await bump_versions("work_orders")
+    live_snapshot.schedule_refresh(live_snapshot.machine_ids_referencing(work_order_id=order_id))
     return {"message": "İş emri silindi"}
 
-@api_router.get("/tasks")
-async def get_tasks(current_user: dict = Depends(get_current_user)):
-    tasks = await db.tasks.find({}, {"_id": 0}).to_list(1000)
-    return tasks
+@api_router.get("/tasks", dependencies=[Depends(collection_etag("tasks"))])
+async def get_tasks(
+    status: Optional[Literal["assigned", "preparation", "in_progress", "paused", "completed", "cancelled"]] = None,
+    machine_id: Optional[str] = None,
+    work_order_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        query = date_range_filter("assigned_at", start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if status:
+        query["status"] = status
+    if machine_id:
+        query["machine_id"] = machine_id
+    if work_order_id:
+        query["work_order_id"] = work_order_id
+    return await find_page(db.tasks, query, {"_id": 0}, limit, after)
 
 @api_router.post("/tasks")
-async def create_task(task_data: TaskCreate, current_user: dict = Depends(get_current_user)):
+async def create_task(
+    task_data: TaskCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
     if current_user["role"] not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
-    work_order = await db.work_orders.find_one({"id": task_data.work_order_id})
-    if not work_order:
-        raise HTTPException(status_code=404, detail="İş emri bulunamadı")
-    
-    machine = await db.machines.find_one({"id": task_data.machine_id})
-    if not machine:
-        raise HTTPException(status_code=404, detail="Makine bulunamadı")
-    
-    task = Task(**task_data.model_dump(), assigned_by=current_user["id"])
-    doc = task.model_dump()
-    doc["assigned_at"] = doc["assigned_at"].isoformat()
-    await db.tasks.insert_one(doc)
-    
-    await db.work_orders.update_one({"id": task_data.work_order_id}, {"$set": {"status": "assigned"}})
+    async def handler():
+        work_order = await db.work_orders.find_one({"id": task_data.work_order_id})
+        if not work_order:
+            raise HTTPException(status_code=404, detail="İş emri bulunamadı")
+        
+        machine = await db.machines.find_one({"id": task_data.machine_id})
+        if not machine:
+            raise HTTPException(status_code=404, detail="Makine bulunamadı")
+        
+        task = Task(**task_data.model_dump(), assigned_by=current_user["id"])
+        doc = task.model_dump()
+        await db.tasks.insert_one(doc)
+        
+        await db.work_orders.update_one(
+            {"id": task_data.work_order_id},
+            {"$set": {"status": "assigned"}, "$inc": {"open_task_count": 1}}
+        )
+        await bump_versions("tasks", "work_orders")
+        
+        response = serialize_doc(doc)
+        live_snapshot.schedule_refresh(
+            [task_data.machine_id] + live_snapshot.machine_ids_referencing(work_order_id=task_data.work_order_id),
+            [{"type": "task_created", "task": response, "work_order": {"id": task_data.work_order_id, "status": "assigned"}}]
+        )
+        return response
     
-    return serialize_doc(doc)
+    return await run_idempotent(idempotency_key, f"tasks:{current_user['id']}", task_data, handler)
 
 @api_router.put("/tasks/{task_id}/claim-worker")
 async def claim_worker_to_task(task_id: str, worker_id: str, current_user: dict = Depends(get_current_user)):
     result = await db.tasks.update_one({"id": task_id}, {"$set": {"current_worker_id": worker_id}})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Görev bulunamadı")
+    await bump_versions("tasks")
     
     return {"message": "İş alındı"}
 
@@ -373,69 +993,201 @@ async def delete_task(task_id: str, current_user: dict = Depends(get_current_use
     if current_user["role"] not in ["admin", "supervisor"]:
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
-    task = await db.tasks.find_one({"id": task_id})
+    # Sayaçlar silinen belgedeki duruma göre düzeltilir; çift tıklanan silme ikinci kez düşmez
+    task = await db.tasks.find_one_and_delete({"id": task_id})
     if not task:
         raise HTTPException(status_code=404, detail="Görev bulunamadı")
     
-    await db.tasks.delete_one({"id": task_id})
+    if task["status"] == "completed":
+        counter_inc = {"completed_task_count": -1, "completed_quantity": -(task.get("quantity_completed") or 0)}
+        await db.work_orders.update_one({"id": task["work_order_id"]}, {"$inc": counter_inc})
+    elif task["status"] != "cancelled":
+        # Son açık görev silindiyse iş emri tamamlanmış olabilir
+        await db.work_orders.update_one({"id": task["work_order_id"]}, [
+            {"$set": {"open_task_count": {"$add": [{"$ifNull": ["$open_task_count", 0]}, -1]}}},
+            WORK_ORDER_COMPLETION_STAGE,
+        ])
     
-    await db.machines.update_one(
-        {"id": task["machine_id"]},
-        {"$set": {"status": "idle", "current_task_id": None, "current_worker_id": None, "current_work_order_id": None}}
-    )
+    machine_reset = {"status": "idle", "current_task_id": None, "current_worker_id": None, "current_work_order_id": None}
+    await db.machines.update_one({"id": task["machine_id"]}, {"$set": machine_reset})
+    await bump_versions("tasks", "work_orders", "machines")
+    live_snapshot.schedule_refresh([task["machine_id"]], [{
+        "type": "task_deleted",
+        "task": {"id": task_id},
+        "machine": {"id": task["machine_id"], **machine_reset},
+        "work_order": {"id": task["work_order_id"]}
+    }])
     
     return {"message": "Görev geri çekildi"}
 
-@api_router.get("/tasks/worker/{worker_id}")
-async def get_worker_tasks(worker_id: str, current_user: dict = Depends(get_current_user)):
+@api_router.get("/tasks/worker/{worker_id}", dependencies=[Depends(collection_etag("tasks"))])
+async def get_worker_tasks(
+    worker_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] == "worker" and current_user["id"] != worker_id:
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
-    tasks = await db.tasks.find({"assigned_worker_id": worker_id, "status": {"$nin": ["completed", "cancelled"]}}, {"_id": 0}).to_list(1000)
-    return tasks
+    query = {"assigned_worker_id": worker_id, "status": {"$nin": ["completed", "cancelled"]}}
+    return await find_page(db.tasks, query, {"_id": 0}, limit, after)
 
-@api_router.post("/work-logs")
-async def create_work_log(log_data: WorkLogCreate, current_user: dict = Depends(get_current_user)):
-    task = await db.tasks.find_one({"id": log_data.task_id})
-    if not task:
-        raise HTTPException(status_code=404, detail="Görev bulunamadı")
+# Olay tipine göre görev / makine / iş emri durum geçişleri
+WORK_LOG_TRANSITIONS = {
+    "prep_start": {"task": "preparation", "machine": "running", "work_order": None},
+    "prep_end": {"task": "in_progress", "machine": "running", "work_order": "in_progress"},
+    "work_start": {"task": "in_progress", "machine": "running", "work_order": "in_progress"},
+    "work_pause": {"task": "paused", "machine": "pause", "work_order": None},
+    "work_resume": {"task": "in_progress", "machine": "running", "work_order": None},
+    "work_complete": {"task": "completed", "machine": "idle", "work_order": None},
+}
+
+# Görev durumuna göre kabul edilen olaylar (toplu gönderimde sıra kontrolü için)
+ALLOWED_WORK_LOG_EVENTS = {
+    "assigned": {"prep_start", "work_start"},
+    "preparation": {"prep_end", "work_start"},
+    "in_progress": {"work_start", "work_pause", "work_complete"},
+    "paused": {"work_resume", "work_complete"},
+    "completed": set(),
+    "cancelled": set(),
+}
+
+# Olaydan önceki görev durumu, iki olay arasındaki sürenin hangi faza yazılacağını belirler
+ROLLUP_PHASE_FIELDS = {"preparation": "prep_minutes", "in_progress": "work_minutes", "paused": "pause_minutes"}
+
+def task_state_after(doc: dict) -> dict:
+    """Task fields set by a work log event; the next event's interval starts here"""
+    return {
+        "status": WORK_LOG_TRANSITIONS[doc["event_type"]]["task"],
+        "last_event_at": doc["timestamp"],
+        "pause_reason": doc.get("pause_reason") if doc["event_type"] == "work_pause" else None,
+    }
+
+def start_of_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def split_by_day(start: datetime, end: datetime):
+    """Yield (day, minutes) pieces of [start, end) cut at UTC midnight"""
+    while start < end:
+        day = start_of_day(start)
+        boundary = min(end, day + timedelta(days=1))
+        yield day, (boundary - start).total_seconds() / 60
+        start = boundary
+
+def rollup_fields(task: dict, doc: dict, timestamp: datetime):
+    """Yield (day, field, value) contributed by one event, given the task state before it"""
+    day = start_of_day(timestamp)
+    yield day, f"event_counts.{doc['event_type']}", 1
+    if doc["event_type"] == "work_pause":
+        yield day, f"pause_counts.{doc.get('pause_reason') or 'unknown'}", 1
+    if doc.get("quantity_completed"):
+        yield day, "production", doc["quantity_completed"]
+    yield from phase_interval(task, timestamp)
+
+def rollup_increments(task: dict, doc: dict) -> dict:
+    """Per-day $inc documents contributed by one event"""
+    increments = {}
+    for day, field, value in rollup_fields(task, doc, parse_timestamp(doc["timestamp"])):
+        day_inc = increments.setdefault(day, {})
+        day_inc[field] = day_inc.get(field, 0) + value
+    return increments
+
+def phase_interval(task: dict, until: datetime):
+    """Yield (day, field, minutes) for the time the task spent in its current phase up to `until`"""
+    field = ROLLUP_PHASE_FIELDS.get(task["status"])
+    if field is None or task.get("last_event_at") is None:
+        return
+    if field == "pause_minutes":
+        field = f"pause_minutes.{task.get('pause_reason') or 'unknown'}"
+    for day, minutes in split_by_day(parse_timestamp(task["last_event_at"]), until):
+        yield day, field, minutes
+
+def rollup_updates(doc: dict, increments: dict) -> list:
+    return [
+        UpdateOne({"day": day, "machine_id": doc["machine_id"], "worker_id": doc["worker_id"]}, {"$inc": inc}, upsert=True)
+        for day, inc in increments.items()
+    ]
+
+class WorkIntervalEngine:
+    """Single pass over work logs producing per-day rollup totals"""
+    # Durum görev başına tutulur; loglar yalnızca her görev içinde zaman sırasında olmalı
+    def __init__(self):
+        self.states = {}
+        self.totals = {}
+        self.events = 0
     
-    work_log = WorkLog(
-        **log_data.model_dump(),
-        worker_id=current_user["id"],
-        machine_id=task["machine_id"]
-    )
-    doc = work_log.model_dump()
-    doc["timestamp"] = doc["timestamp"].isoformat()
-    await db.work_logs.insert_one(doc)
-    
-    if log_data.event_type == "prep_start":
-        await db.tasks.update_one({"id": log_data.task_id}, {"$set": {"status": "preparation"}})
-        await db.machines.update_one(
-            {"id": task["machine_id"]},
-            {"$set": {"status": "running", "current_task_id": log_data.task_id, "current_worker_id": current_user["id"], "current_work_order_id": task["work_order_id"]}}
-        )
-    elif log_data.event_type == "prep_end":
-        await db.tasks.update_one({"id": log_data.task_id}, {"$set": {"status": "in_progress"}})
-        await db.work_orders.update_one({"id": task["work_order_id"]}, {"$set": {"status": "in_progress"}})
-        await db.machines.update_one({"id": task["machine_id"]}, {"$set": {"status": "running"}})
-    elif log_data.event_type == "work_start":
-        await db.tasks.update_one({"id": log_data.task_id}, {"$set": {"status": "in_progress"}})
-        await db.work_orders.update_one({"id": task["work_order_id"]}, {"$set": {"status": "in_progress"}})
-        await db.machines.update_one({"id": task["machine_id"]}, {"$set": {"status": "running"}})
-    elif log_data.event_type == "work_pause":
-        await db.tasks.update_one({"id": log_data.task_id}, {"$set": {"status": "paused"}})
-        await db.machines.update_one({"id": task["machine_id"]}, {"$set": {"status": "pause"}})
-    elif log_data.event_type == "work_resume":
-        await db.tasks.update_one({"id": log_data.task_id}, {"$set": {"status": "in_progress"}})
-        await db.machines.update_one({"id": task["machine_id"]}, {"$set": {"status": "running"}})
-    elif log_data.event_type == "work_complete":
-        quantity_completed = log_data.quantity_completed or 0
-        await db.tasks.update_one(
-            {"id": log_data.task_id},
-            {"$set": {"status": "completed", "quantity_completed": quantity_completed}}
-        )
+    def _add(self, key: tuple, field: str, value):
+        fields = self.totals.get(key)
+        if fields is None:
+            fields = self.totals[key] = {}
+        fields[field] = fields.get(field, 0) + value
+    
+    def feed(self, log: dict):
+        timestamp = parse_timestamp(log["timestamp"])
+        machine_id, worker_id = log["machine_id"], log["worker_id"]
+        state = self.states.get(log["task_id"], {"status": "assigned"})
+        for day, field, value in rollup_fields(state, log, timestamp):
+            self._add((day, machine_id, worker_id), field, value)
         
+        state = task_state_after(log)
+        state.update(last_event_at=timestamp, machine_id=machine_id, worker_id=worker_id)
+        self.states[log["task_id"]] = state
+        self.events += 1
+    
+    def close_open(self, until: datetime):
+        """Count the phase each open task is still in up to `until`"""
+        for state in self.states.values():
+            for day, field, minutes in phase_interval(state, until):
+                self._add((day, state["machine_id"], state["worker_id"]), field, minutes)
+    
+    def documents(self) -> list:
+        """Totals shaped like daily_rollups documents (dotted fields nested)"""
+        docs = []
+        for (day, machine_id, worker_id), fields in sorted(self.totals.items(), key=lambda item: item[0][0]):
+            doc = {"day": day, "machine_id": machine_id, "worker_id": worker_id}
+            for field, value in fields.items():
+                parent, _, child = field.partition(".")
+                if child:
+                    doc.setdefault(parent, {})[child] = value
+                else:
+                    doc[parent] = value
+            docs.append(doc)
+        return docs
+
+# Sayaçlar güncellendikten sonra çalışır: açık görev kalmadıysa ve en az bir görev bittiyse iş emri tamamlanır
+WORK_ORDER_COMPLETION_STAGE = {"$set": {"status": {"$cond": [
+    {"$and": [{"$lte": ["$open_task_count", 0]}, {"$gt": ["$completed_task_count", 0]}]},
+    "completed",
+    "$status"
+]}}}
+
+WORK_LOG_PLAN_COLLECTIONS = ["work_logs", "tasks", "work_orders", "daily_rollups"]
+
+def plan_work_log_writes(task: dict, doc: dict) -> dict:
+    """Return the task update and the per-collection bulk writes that apply a work log event"""
+    event_type = doc["event_type"]
+    transition = WORK_LOG_TRANSITIONS[event_type]
+    increments = rollup_increments(task, doc)
+    task_set = task_state_after(doc)
+    plan = {
+        # Okunan durum değiştiyse (eşzamanlı olay) güncelleme hiçbir görevle eşleşmez
+        "task_filter": {"id": task["id"], "status": task["status"], "last_event_at": task.get("last_event_at")},
+        "task_set": task_set,
+        "machine_filter": {"id": task["machine_id"]},
+        "rollup_days": set(increments),
+        "work_logs": [InsertOne(doc)], "tasks": [], "work_orders": [],
+        "daily_rollups": rollup_updates(doc, increments),
+    }
+
+    machine_set = {"status": transition["machine"]}
+    if event_type == "prep_start":
+        machine_set.update({"current_task_id": task["id"], "current_worker_id": doc["worker_id"], "current_work_order_id": task["work_order_id"]})
+    elif event_type == "work_complete":
+        quantity_completed = doc.get("quantity_completed") or 0
+        task_set["quantity_completed"] = quantity_completed
+        machine_set.update({"current_task_id": None, "current_worker_id": None, "current_work_order_id": None})
+
         remaining = task["quantity_assigned"] - quantity_completed
         if remaining > 0:
             new_task = Task(
@@ -445,254 +1197,971 @@ async def create_work_log(log_data: WorkLogCreate, current_user: dict = Depends(
                 status="assigned",
                 quantity_assigned=remaining
             )
-            new_doc = new_task.model_dump()
-            new_doc["assigned_at"] = new_doc["assigned_at"].isoformat()
-            await db.tasks.insert_one(new_doc)
-        
-        all_tasks = await db.tasks.find({"work_order_id": task["work_order_id"]}).to_list(1000)
-        all_completed = all([t["status"] == "completed" for t in all_tasks])
-        if all_completed:
-            await db.work_orders.update_one({"id": task["work_order_id"]}, {"$set": {"status": "completed"}})
-        
-        await db.machines.update_one(
-            {"id": task["machine_id"]},
-            {"$set": {"status": "idle", "current_task_id": None, "current_worker_id": None, "current_work_order_id": None}}
+            plan["tasks"].append(InsertOne(new_task.model_dump()))
+
+        # Tek güncellemede sayaçlar değişir ve açık görev kalmadıysa iş emri tamamlanır
+        open_delta = -1 + (1 if remaining > 0 else 0)
+        plan["work_orders"].append(UpdateOne({"id": task["work_order_id"]}, [
+            {"$set": {
+                "open_task_count": {"$add": [{"$ifNull": ["$open_task_count", 0]}, open_delta]},
+                "completed_task_count": {"$add": [{"$ifNull": ["$completed_task_count", 0]}, 1]},
+                "completed_quantity": {"$add": [{"$ifNull": ["$completed_quantity", 0]}, quantity_completed]},
+            }},
+            WORK_ORDER_COMPLETION_STAGE,
+        ]))
+
+    plan["machine_set"] = machine_set
+    if transition["work_order"]:
+        plan["work_orders"].append(UpdateOne({"id": task["work_order_id"]}, {"$set": {"status": transition["work_order"]}}))
+    return plan
+
+def merge_work_log_plan(target: dict, plan: dict):
+    """Fold a later event's plan for the same task into target; target keeps its task_filter"""
+    # Aynı görevin olayları tek görev ve tek makine güncellemesine iner; son olayın değerleri kalır
+    target["task_set"].update(plan["task_set"])
+    target["machine_set"].update(plan["machine_set"])
+    target["rollup_days"] |= plan["rollup_days"]
+    for name in WORK_LOG_PLAN_COLLECTIONS:
+        target[name].extend(plan[name])
+
+async def apply_work_log_plans(task_plans: dict, session=None):
+    """Write per-task work log plans; return (ids of tasks whose update matched nothing, meta updates)"""
+    # Önce görev güncellemesi: eski okumayla kurulmuş plan eşleşmez ve diğer yazımları uygulanmaz.
+    # Transaction yoksa (tek mongod) sonraki yazımlar atomik değildir
+    task_ids = list(task_plans)
+    updates = [
+        db.tasks.update_one(task_plans[task_id]["task_filter"], {"$set": task_plans[task_id]["task_set"]}, session=session)
+        for task_id in task_ids
+    ]
+    if session is None:
+        results = await asyncio.gather(*updates)
+    else:
+        results = [await update for update in updates]
+    conflicts = {task_id for task_id, result in zip(task_ids, results) if result.matched_count == 0}
+
+    plan = {name: [] for name in WORK_LOG_PLAN_COLLECTIONS + ["machines"]}
+    rollup_days = set()
+    for task_id in task_ids:
+        if task_id not in conflicts:
+            for name in WORK_LOG_PLAN_COLLECTIONS:
+                plan[name].extend(task_plans[task_id][name])
+            plan["machines"].append(UpdateOne(task_plans[task_id]["machine_filter"], {"$set": task_plans[task_id]["machine_set"]}))
+            rollup_days |= task_plans[task_id]["rollup_days"]
+    if len(conflicts) == len(task_ids):
+        return conflicts, []
+    await execute_writes(plan, session)
+    return conflicts, plan_meta_updates({"tasks", *(name for name, ops in plan.items() if ops)}, rollup_days)
+
+async def write_work_log_plans(task_plans: dict) -> set:
+    """Apply work log plans (in a transaction when supported); return the conflicting task ids"""
+    conflicts, meta_updates = await run_transaction(lambda session: apply_work_log_plans(task_plans, session))
+    # Sürüm sayaçları commit'ten sonra artırılır; transaction içinde tüm eşzamanlı olaylar bu tek belgede çakışırdı
+    if meta_updates:
+        await db.meta.bulk_write(meta_updates, ordered=True)
+    return conflicts
+
+async def execute_writes(plan: dict, session=None):
+    """Apply a write plan: one ordered bulk_write per collection"""
+    writes = [(name, ops) for name, ops in plan.items() if ops]
+    if session is None:
+        await asyncio.gather(*(db[name].bulk_write(ops, ordered=True) for name, ops in writes))
+    else:
+        for name, ops in writes:
+            await db[name].bulk_write(ops, ordered=True, session=session)
+
+async def run_transaction(callback):
+    """Run callback(session) in a multi-document transaction when the deployment supports it"""
+    if not transactions_supported:
+        return await callback(None)
+    async with await client.start_session() as session:
+        return await session.with_transaction(callback)
+
+def work_log_event(task: dict, doc: dict) -> dict:
+    """Describe the state change applied by a work log for push subscribers"""
+    transition = WORK_LOG_TRANSITIONS[doc["event_type"]]
+    machine = {"id": task["machine_id"], "status": transition["machine"]}
+    if doc["event_type"] == "prep_start":
+        machine.update({"current_task_id": task["id"], "current_worker_id": doc["worker_id"], "current_work_order_id": task["work_order_id"]})
+    elif doc["event_type"] == "work_complete":
+        machine.update({"current_task_id": None, "current_worker_id": None, "current_work_order_id": None})
+    work_order = {"id": task["work_order_id"]}
+    if transition["work_order"]:
+        work_order["status"] = transition["work_order"]
+    return {
+        "type": "work_log",
+        "log": serialize_doc(doc),
+        "task": {"id": task["id"], "status": transition["task"]},
+        "machine": machine,
+        "work_order": work_order
+    }
+
+@api_router.post("/work-logs")
+async def create_work_log(
+    log_data: WorkLogCreate,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
+    async def handler():
+        task = await db.tasks.find_one({"id": log_data.task_id})
+        if not task:
+            raise HTTPException(status_code=404, detail="Görev bulunamadı")
+        # Tekrar gönderilen work_complete sayaçları ikinci kez değiştirmesin
+        if log_data.event_type not in ALLOWED_WORK_LOG_EVENTS.get(task["status"], set()):
+            raise HTTPException(status_code=409, detail=f"'{task['status']}' durumundaki göreve '{log_data.event_type}' uygulanamaz")
+        
+        work_log = WorkLog(
+            **log_data.model_dump(),
+            worker_id=current_user["id"],
+            machine_id=task["machine_id"]
+        )
+        doc = work_log.model_dump()
+        plans = {task["id"]: plan_work_log_writes(task, doc)}
+        if await write_work_log_plans(plans):
+            raise HTTPException(status_code=409, detail="Görev bu sırada değişti, lütfen tekrar deneyin")
+        live_snapshot.schedule_refresh(
+            [task["machine_id"]] + live_snapshot.machine_ids_referencing(work_order_id=task["work_order_id"]),
+            [work_log_event(task, doc)]
         )
+        
+        return serialize_doc(doc)
     
-    return serialize_doc(doc)
+    return await run_idempotent(idempotency_key, f"work-logs:{current_user['id']}", log_data, handler)
 
-@api_router.get("/work-logs/task/{task_id}")
-async def get_task_logs(task_id: str, current_user: dict = Depends(get_current_user)):
-    logs = await db.work_logs.find({"task_id": task_id}, {"_id": 0}).to_list(1000)
-    return logs
-
-@api_router.get("/dashboard/live-status")
-async def get_live_status(current_user: dict = Depends(get_current_user)):
-    machines = await db.machines.find({}, {"_id": 0}).to_list(1000)
-    tasks = await db.tasks.find({"status": {"$in": ["preparation", "in_progress", "paused"]}}, {"_id": 0}).to_list(1000)
+@api_router.post("/work-logs/batch")
+async def create_work_logs_batch(
+    events: List[WorkLogBatchItem],
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
+    if len(events) > MAX_WORK_LOG_BATCH:
+        raise HTTPException(status_code=400, detail=f"Tek seferde en fazla {MAX_WORK_LOG_BATCH} olay gönderilebilir")
     
-    machine_status = []
-    for machine in machines:
-        task_info = None
-        worker_info = None
-        work_order_info = None
+    async def handler():
+        task_ids = list({event.task_id for event in events})
+        tasks = {t["id"]: t for t in await db.tasks.find({"id": {"$in": task_ids}}, {"_id": 0}).to_list(None)}
         
-        if machine.get("current_task_id"):
-            task = next((t for t in tasks if t["id"] == machine["current_task_id"]), None)
-            if task:
-                task_info = task
-                work_order = await db.work_orders.find_one({"id": task["work_order_id"]}, {"_id": 0})
-                work_order_info = work_order
-                
-                if machine.get("current_worker_id"):
-                    worker = await db.users.find_one({"id": machine["current_worker_id"]}, {"_id": 0, "password_hash": 0})
-                    worker_info = worker
+        task_plans = {}
+        results = []
+        events_to_publish = []
+        for index, event in enumerate(events):
+            task = tasks.get(event.task_id)
+            if task is None:
+                results.append({"index": index, "status": "rejected", "detail": "Görev bulunamadı"})
+                continue
+            if event.event_type not in ALLOWED_WORK_LOG_EVENTS.get(task["status"], set()):
+                results.append({"index": index, "status": "rejected", "detail": f"'{task['status']}' durumundaki göreve '{event.event_type}' uygulanamaz"})
+                continue
         
-        machine_status.append({
-            "machine": machine,
-            "task": task_info,
-            "worker": worker_info,
-            "work_order": work_order_info
+            fields = event.model_dump(exclude={"timestamp"})
+            if event.timestamp is not None:
+                fields["timestamp"] = parse_timestamp(event.timestamp)
+            work_log = WorkLog(**fields, worker_id=current_user["id"], machine_id=task["machine_id"])
+            doc = work_log.model_dump()
+            plan = plan_work_log_writes(task, doc)
+            # Aynı görevin olayları tek görev güncellemesinde birleşir
+            if event.task_id in task_plans:
+                merge_work_log_plan(task_plans[event.task_id], plan)
+            else:
+                task_plans[event.task_id] = plan
+            events_to_publish.append(work_log_event(task, doc))
+            # Sonraki olaylar bu olaydan sonraki görev durumuna göre kontrol edilir
+            tasks[event.task_id] = {**task, **task_state_after(doc)}
+            results.append({"index": index, "status": "created", "log": serialize_doc(doc)})
+        
+        if task_plans:
+            conflicts = await write_work_log_plans(task_plans)
+            for result in results:
+                if result["status"] == "created" and result["log"]["task_id"] in conflicts:
+                    result.update({"status": "rejected", "detail": "Görev bu sırada değişti"})
+                    del result["log"]
+            events_to_publish = [event for event in events_to_publish if event["task"]["id"] not in conflicts]
+            machine_ids = [event["machine"]["id"] for event in events_to_publish]
+            for event in events_to_publish:
+                machine_ids += live_snapshot.machine_ids_referencing(work_order_id=event["work_order"]["id"])
+            live_snapshot.schedule_refresh(machine_ids, events_to_publish)
+        
+        return {
+            "accepted": sum(1 for r in results if r["status"] == "created"),
+            "rejected": sum(1 for r in results if r["status"] == "rejected"),
+            "results": results
+        }
+    
+    return await run_idempotent(idempotency_key, f"work-logs-batch:{current_user['id']}", events, handler)
+
+@api_router.get("/work-logs/task/{task_id}")
+async def get_task_logs(
+    task_id: str,
+    event_type: Optional[Literal["prep_start", "prep_end", "work_start", "work_pause", "work_resume", "work_complete"]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        query = {"task_id": task_id, **date_range_filter("timestamp", start_date, end_date)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if event_type:
+        query["event_type"] = event_type
+    return await find_page(db.work_logs, query, {"_id": 0}, limit, after)
+
+EXPORT_COLUMNS = [
+    "id", "timestamp", "event_type", "task_id", "worker_id", "worker_username", "worker_full_name",
+    "machine_id", "machine_code", "pause_reason", "quantity_completed", "notes",
+]
+
+def export_rows(docs: list, users: dict, machines: dict) -> list:
+    rows = []
+    for doc in docs:
+        user = users.get(doc.get("worker_id"), {})
+        rows.append({
+            **doc,
+            "timestamp": parse_timestamp(doc["timestamp"]).isoformat(),
+            "worker_username": user.get("username"),
+            "worker_full_name": user.get("full_name"),
+            "machine_code": machines.get(doc.get("machine_id"), {}).get("code"),
         })
+    return rows
+
+def encode_csv(rows: list, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+def encode_ndjson(rows: list) -> str:
+    return "".join(dumps_json({k: row.get(k) for k in EXPORT_COLUMNS}).decode() + "\n" for row in rows)
+
+@api_router.get("/exports/work-logs")
+async def export_work_logs(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    machine_id: Optional[str] = None,
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
-    return machine_status
+    try:
+        query = date_range_filter("timestamp", start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if worker_id:
+        query["worker_id"] = worker_id
+    if machine_id:
+        query["machine_id"] = machine_id
+    
+    # Kullanıcı ve makine listeleri küçük; satırlara ad / kod eklemek için bir kez okunur
+    users = {u["id"]: u for u in await db.users.find({}, {"_id": 0, "id": 1, "username": 1, "full_name": 1}).to_list(None)}
+    machines = {m["id"]: m for m in await db.machines.find({}, {"_id": 0, "id": 1, "code": 1}).to_list(None)}
+    
+    async def chunks():
+        # Bellekte en fazla bir parti tutulur; her parti ayrı bir parça olarak gönderilir
+        if format == "csv":
+            yield encode_csv([], header=True)
+        cursor = db.work_logs.find(query, {"_id": 0}).sort("timestamp", ASCENDING).batch_size(EXPORT_BATCH_SIZE)
+        try:
+            batch = []
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= EXPORT_BATCH_SIZE:
+                    rows = export_rows(batch, users, machines)
+                    yield encode_csv(rows) if format == "csv" else encode_ndjson(rows)
+                    batch = []
+            if batch:
+                rows = export_rows(batch, users, machines)
+                yield encode_csv(rows) if format == "csv" else encode_ndjson(rows)
+        finally:
+            await cursor.close()
+    
+    async def gzipped(source):
+        compressor = zlib.compressobj(wbits=31)
+        async for chunk in source:
+            # SYNC_FLUSH: her parti sıkıştırıcıda beklemeden istemciye ulaşır
+            yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"work_logs.{format}"
+    body = (chunk.encode() async for chunk in chunks())
+    if gzip:
+        media_type, filename, body = "application/gzip", filename + ".gz", gzipped(chunks())
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.post("/events/stream-token")
+async def create_event_stream_token(current_user: dict = Depends(get_current_user)):
+    return {"token": create_stream_token(current_user["id"]), "expires_in": STREAM_TOKEN_TTL_SECONDS}
+
+@api_router.get("/events/stream")
+async def stream_events(request: Request, token: str):
+    # EventSource başlık gönderemediği için /events/stream-token ile alınan kısa ömürlü token sorgu parametresiyle gelir
+    user = await get_user_from_token(token, scope=STREAM_TOKEN_SCOPE)
+    queue = event_broker.subscribe()
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            checked_at = time.monotonic()
+            while not await request.is_disconnected():
+                # Silinen kullanıcının akışı en geç bir heartbeat süresi sonra kapanır
+                if time.monotonic() - checked_at >= SSE_HEARTBEAT_SECONDS:
+                    if await load_user(user["id"]) is None:
+                        break
+                    checked_at = time.monotonic()
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield b"data: " + dumps_json(event) + b"\n\n"
+        finally:
+            event_broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/dashboard/live-status")
+async def get_live_status(request: Request, response: Response, include_logs: bool = False, current_user: dict = Depends(get_current_user)):
+    if not live_snapshot.ready:
+        await live_snapshot.rebuild()
+    etag = make_etag(request, live_snapshot.content_hash)
+    if etag_matches(request, etag):
+        raise NotModified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if include_logs:
+        return live_snapshot.list()
+    return [{k: v for k, v in entry.items() if k != "logs"} for entry in live_snapshot.list()]
+
+ROLLUP_REBUILD_BATCH = 1000
+ROLLUP_REBUILD_CATCHUP_PASSES = 5
+
+async def write_rollup_totals(collection, totals: dict, batch_size: int):
+    operations = [
+        UpdateOne({"day": day, "machine_id": machine_id, "worker_id": worker_id}, {"$inc": inc}, upsert=True)
+        for (day, machine_id, worker_id), inc in totals.items()
+    ]
+    for i in range(0, len(operations), batch_size):
+        await collection.bulk_write(operations[i:i + batch_size], ordered=False)
+
+async def rebuild_daily_rollups(batch_size: int = ROLLUP_REBUILD_BATCH) -> dict:
+    """Replay every work log into staging and swap it in; events written after the last catch-up pass are lost"""
+    staging = db["daily_rollups_rebuild"]
+    await staging.drop()
+    
+    # Başlangıç sınırı: _id bundan küçük loglar ana geçişte, diğerleri yakalama geçişlerinde okunur
+    cutoff = ObjectId.from_datetime(datetime.now(timezone.utc))
+    engine = WorkIntervalEngine()
+    cursor = db.work_logs.find({"_id": {"$lt": cutoff}}, {"_id": 0}).sort([("task_id", ASCENDING), ("timestamp", ASCENDING)]).batch_size(batch_size)
+    async for doc in cursor:
+        engine.feed(doc)
+    await write_rollup_totals(staging, engine.totals, batch_size)
+    
+    # Bu arada daha yeni bir olay işlenmiş görevlerin durumu geri alınmaz
+    task_updates = [
+        UpdateOne(
+            {"id": task_id, "last_event_at": {"$not": {"$gt": state["last_event_at"]}}},
+            {"$set": {"last_event_at": state["last_event_at"], "pause_reason": state["pause_reason"]}}
+        )
+        for task_id, state in engine.states.items()
+    ]
+    for i in range(0, len(task_updates), batch_size):
+        await db.tasks.bulk_write(task_updates[i:i + batch_size], ordered=False)
+    for collection_name, keys, options in INDEXES:
+        if collection_name == "daily_rollups":
+            await staging.create_index(keys, **options)
+    
+    # Çalışma sırasında yazılan olaylar canlı koleksiyona işlendi; değişimin hemen öncesinde staging'e de işlenir
+    replayed = set()
+    for _ in range(ROLLUP_REBUILD_CATCHUP_PASSES):
+        late = await db.work_logs.find({"_id": {"$gte": cutoff, "$nin": list(replayed)}}).sort("timestamp", ASCENDING).to_list(None)
+        if not late:
+            break
+        engine.totals = {}
+        for doc in late:
+            replayed.add(doc["_id"])
+            engine.feed(doc)
+        await write_rollup_totals(staging, engine.totals, batch_size)
+    
+    rollups = await staging.count_documents({})
+    if rollups:
+        await staging.rename("daily_rollups", dropTarget=True)
+    else:
+        await staging.drop()
+        await db.daily_rollups.delete_many({})
+    await db.meta.update_one({"_id": REPORT_DAYS_DOC_ID}, {"$inc": {"generation": 1}}, upsert=True)
+    await bump_versions("tasks")
+    return {"events": engine.events, "replayed": len(replayed), "rollups": rollups, "tasks": len(task_updates)}
+
+def merge_counts(target: dict, source: dict):
+    """Add the numeric (possibly nested) fields of source into target"""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            merge_counts(target.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            target[key] = target.get(key, 0) + value
+
+def rollup_summary(docs: list) -> dict:
+    totals = {}
+    for doc in docs:
+        merge_counts(totals, doc)
+    event_counts = totals.get("event_counts", {})
+    return {
+        "total_logs": sum(event_counts.values()),
+        "total_production": totals.get("production", 0),
+        "event_counts": event_counts,
+        "pause_reasons": totals.get("pause_counts", {}),
+        "prep_minutes": totals.get("prep_minutes", 0),
+        "work_minutes": totals.get("work_minutes", 0),
+        "pause_minutes": totals.get("pause_minutes", {}),
+    }
+
+async def load_rollups(match: dict) -> list:
+    return await db.daily_rollups.find(match, {"_id": 0}).sort("day", ASCENDING).to_list(None)
+
+def rollup_report(docs: list) -> dict:
+    summary = rollup_summary(docs)
+    return {
+        "total_logs": summary["total_logs"],
+        "total_production": summary["total_production"],
+        "event_counts": summary["event_counts"],
+        "pause_reasons": summary["pause_reasons"],
+        "prep_time_minutes": round(summary["prep_minutes"], 2),
+        "work_time_minutes": round(summary["work_minutes"], 2),
+        "pause_time_minutes": {reason: round(minutes, 2) for reason, minutes in summary["pause_minutes"].items()},
+    }
+
+async def report_logs(match: dict) -> list:
+    return await db.work_logs.find(match, {"_id": 0}).sort("timestamp", ASCENDING).to_list(None)
 
 @api_router.get("/reports/daily")
-async def get_daily_report(date: str, current_user: dict = Depends(get_current_user)):
+async def get_daily_report(date: str, include_logs: bool = False, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
     try:
-        target_date = datetime.fromisoformat(date)
-        start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        logs = await db.work_logs.find({
-            "timestamp": {
-                "$gte": start_of_day.isoformat(),
-                "$lt": end_of_day.isoformat()
-            }
-        }, {"_id": 0}).to_list(10000)
-        
-        total_production = sum([log.get("quantity_completed", 0) for log in logs if log.get("quantity_completed")])
+        day = start_of_day(parse_timestamp(date))
         
-        pause_logs = [log for log in logs if log["event_type"] == "work_pause"]
-        pause_reasons = {}
-        for log in pause_logs:
-            reason = log.get("pause_reason", "unknown")
-            pause_reasons[reason] = pause_reasons.get(reason, 0) + 1
+        async def build():
+            return {"date": date, **rollup_report(await load_rollups({"day": day}))}
         
-        return {
-            "date": date,
-            "total_logs": len(logs),
-            "total_production": total_production,
-            "pause_reasons": pause_reasons,
-            "logs": logs
-        }
+        report = await cached_report("daily", {"date": date}, day, day, build)
+        # Ham loglar önbelleğe alınmaz; her istekte okunur
+        if include_logs:
+            report = {**report, "logs": await report_logs({"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}})}
+        return report
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/reports/weekly")
-async def get_weekly_report(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
+async def get_weekly_report(start_date: str, end_date: str, include_logs: bool = False, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
     try:
-        start = datetime.fromisoformat(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
-        end = datetime.fromisoformat(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
+        start = start_of_day(parse_timestamp(start_date))
+        end = start_of_day(parse_timestamp(end_date))
         
-        logs = await db.work_logs.find({
-            "timestamp": {
-                "$gte": start.isoformat(),
-                "$lte": end.isoformat()
-            }
-        }, {"_id": 0}).to_list(10000)
+        async def build():
+            return {"start_date": start_date, "end_date": end_date, **rollup_report(await load_rollups({"day": {"$gte": start, "$lte": end}}))}
         
-        total_production = sum([log.get("quantity_completed", 0) for log in logs if log.get("quantity_completed")])
-        
-        pause_logs = [log for log in logs if log["event_type"] == "work_pause"]
-        pause_reasons = {}
-        for log in pause_logs:
-            reason = log.get("pause_reason", "unknown")
-            pause_reasons[reason] = pause_reasons.get(reason, 0) + 1
-        
-        return {
-            "start_date": start_date,
-            "end_date": end_date,
-            "total_logs": len(logs),
-            "total_production": total_production,
-            "pause_reasons": pause_reasons,
-            "logs": logs
-        }
+        report = await cached_report("weekly", {"start_date": start_date, "end_date": end_date}, start, end, build)
+        if include_logs:
+            report = {**report, "logs": await report_logs({"timestamp": {"$gte": start, "$lt": end + timedelta(days=1)}})}
+        return report
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+PAUSE_REASONS = ["break", "failure", "material_shortage", "toilet", "prayer", "meal"]
+
+async def open_phase_documents(worker_ids: Optional[list], start: datetime, end: datetime) -> list:
+    """Rollup-shaped documents for the phase each open task is still in"""
+    # Kapalı aralıklar da sayılır (ör. gece molada kalan makine); görevin sonraki olayı bu süreyi rollup'a yazıp günleri geçersiz kılar
+    now = datetime.now(timezone.utc)
+    if now < start:
+        return []
+    machine_query = {"current_worker_id": {"$in": worker_ids} if worker_ids is not None else {"$ne": None}}
+    machines = await db.machines.find(machine_query, {"_id": 0, "current_task_id": 1, "current_worker_id": 1}).to_list(None)
+    worker_by_task = {m["current_task_id"]: m["current_worker_id"] for m in machines if m.get("current_task_id")}
+    open_tasks = await db.tasks.find({
+        "id": {"$in": list(worker_by_task)},
+        "status": {"$in": LIVE_TASK_STATUSES}
+    }, {"_id": 0}).to_list(None)
+    engine = WorkIntervalEngine()
+    for task in open_tasks:
+        engine.states[task["id"]] = {**task, "worker_id": worker_by_task[task["id"]]}
+    engine.close_open(min(now, start_of_day(end) + timedelta(days=1)))
+    return [doc for doc in engine.documents() if start <= doc["day"] <= end]
+
 @api_router.get("/reports/worker-performance")
-async def get_worker_performance(worker_id: str, start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
+async def get_worker_performance(worker_id: str, start_date: str, end_date: str, include_logs: bool = False, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Yetkiniz yok")
     
     try:
-        start = datetime.fromisoformat(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
-        end = datetime.fromisoformat(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
+        start = start_of_day(parse_timestamp(start_date))
+        end = start_of_day(parse_timestamp(end_date))
         
         # Worker bilgisi
         worker = await db.users.find_one({"id": worker_id}, {"_id": 0, "password_hash": 0})
         if not worker:
             raise HTTPException(status_code=404, detail="Eleman bulunamadı")
         
-        # Worker'ın tüm logları
-        logs = await db.work_logs.find({
-            "worker_id": worker_id,
-            "timestamp": {
-                "$gte": start.isoformat(),
-                "$lte": end.isoformat()
-            }
-        }, {"_id": 0}).to_list(10000)
-        
-        # Toplam üretim
-        total_production = sum([log.get("quantity_completed", 0) for log in logs if log.get("quantity_completed")])
-        
-        # Süreleri hesapla
-        prep_time = 0  # Ön hazırlık süresi (dakika)
-        work_time = 0  # Üretim süresi (dakika)
-        pause_times = {
-            "break": 0,
-            "failure": 0,
-            "material_shortage": 0,
-            "toilet": 0,
-            "prayer": 0,
-            "meal": 0
-        }  # Mola süreleri (dakika)
-        
-        # Task bazlı hesaplama
-        tasks = await db.tasks.find({
-            "current_worker_id": worker_id
-        }, {"_id": 0}).to_list(1000)
-        
-        for task in tasks:
-            task_logs = [log for log in logs if log["task_id"] == task["id"]]
-            task_logs.sort(key=lambda x: x["timestamp"])
+        async def build():
+            # Gün x makine başına birer rollup belgesi
+            docs = await load_rollups({"worker_id": worker_id, "day": {"$gte": start, "$lte": end}})
             
-            i = 0
-            while i < len(task_logs):
-                log = task_logs[i]
-                
-                if log["event_type"] == "prep_start" and i + 1 < len(task_logs):
-                    next_log = task_logs[i + 1]
-                    if next_log["event_type"] == "prep_end":
-                        t1 = datetime.fromisoformat(log["timestamp"])
-                        t2 = datetime.fromisoformat(next_log["timestamp"])
-                        prep_time += (t2 - t1).total_seconds() / 60
-                        i += 2
-                        continue
-                
-                elif log["event_type"] == "work_start" or log["event_type"] == "work_resume":
-                    if i + 1 < len(task_logs):
-                        next_log = task_logs[i + 1]
-                        if next_log["event_type"] in ["work_pause", "work_complete"]:
-                            t1 = datetime.fromisoformat(log["timestamp"])
-                            t2 = datetime.fromisoformat(next_log["timestamp"])
-                            work_time += (t2 - t1).total_seconds() / 60
-                            i += 2
-                            continue
-                
-                elif log["event_type"] == "work_pause":
-                    if i + 1 < len(task_logs):
-                        next_log = task_logs[i + 1]
-                        if next_log["event_type"] == "work_resume":
-                            t1 = datetime.fromisoformat(log["timestamp"])
-                            t2 = datetime.fromisoformat(next_log["timestamp"])
-                            pause_duration = (t2 - t1).total_seconds() / 60
-                            reason = log.get("pause_reason", "break")
-                            if reason in pause_times:
-                                pause_times[reason] += pause_duration
-                            i += 2
-                            continue
-                
-                i += 1
-        
-        # Toplam çalışma süresi
-        total_work_time = prep_time + work_time
-        total_pause_time = sum(pause_times.values())
-        
-        # Günlük bazda dağılım
-        daily_breakdown = {}
-        for log in logs:
-            log_date = datetime.fromisoformat(log["timestamp"]).date().isoformat()
-            if log_date not in daily_breakdown:
-                daily_breakdown[log_date] = {
+            # Açık görevlerin sürmekte olan fazı henüz rollup'a yazılmadı; şu ana kadar sayılır
+            docs += await open_phase_documents([worker_id], start, end)
+            
+            summary = rollup_summary(docs)
+            prep_time = summary["prep_minutes"]
+            work_time = summary["work_minutes"]
+            pause_times = summary["pause_minutes"]
+            
+            # Toplam çalışma süresi
+            total_work_time = prep_time + work_time
+            total_pause_time = sum(pause_times.values())
+            
+            # Günlük bazda dağılım
+            docs_by_day = {}
+            for doc in docs:
+                docs_by_day.setdefault(doc["day"].date().isoformat(), []).append(doc)
+            daily_breakdown = []
+            for log_date, day_docs in sorted(docs_by_day.items()):
+                day_summary = rollup_summary(day_docs)
+                daily_breakdown.append({
                     "date": log_date,
-                    "prep_time": 0,
-                    "work_time": 0,
-                    "pause_time": 0,
-                    "production": 0
-                }
+                    "prep_time": round(day_summary["prep_minutes"], 2),
+                    "work_time": round(day_summary["work_minutes"], 2),
+                    "pause_time": round(sum(day_summary["pause_minutes"].values()), 2),
+                    "production": day_summary["total_production"]
+                })
+            
+            report = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "summary": {
+                    "total_production": summary["total_production"],
+                    "total_prep_time_minutes": round(prep_time, 2),
+                    "total_work_time_minutes": round(work_time, 2),
+                    "total_work_time_hours": round(total_work_time / 60, 2),
+                    "total_pause_time_minutes": round(total_pause_time, 2),
+                    "total_pause_time_hours": round(total_pause_time / 60, 2),
+                    "pause_breakdown": {
+                        f"{reason}_minutes": round(pause_times.get(reason, 0), 2) for reason in PAUSE_REASONS
+                    }
+                },
+                "daily_breakdown": daily_breakdown
+            }
+            return report
         
-        return {
+        params = {"worker_id": worker_id, "start_date": start_date, "end_date": end_date}
+        # Önbellekte yalnızca toplamlar var; eleman kaydı yukarıda okundu, ham loglar ayrıca eklenir
+        report = {"worker": worker, **await cached_report("worker-performance", params, start, end, build)}
+        if include_logs:
+            report["logs"] = await report_logs({"worker_id": worker_id, "timestamp": {"$gte": start, "$lt": end + timedelta(days=1)}})
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+LEADERBOARD_SORT_FIELDS = {
+    "production": "total_production",
+    "work_time": "total_work_time_minutes",
+    "prep_time": "total_prep_time_minutes",
+    "pause_time": "total_pause_time_minutes",
+}
+
+@api_router.get("/reports/worker-leaderboard")
+async def get_worker_leaderboard(
+    start_date: str,
+    end_date: str,
+    sort_by: Literal["production", "work_time", "prep_time", "pause_time"] = "production",
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Yetkiniz yok")
+    
+    try:
+        start = start_of_day(parse_timestamp(start_date))
+        end = start_of_day(parse_timestamp(end_date))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def build():
+        # Tek gruplu sorgu: eleman başına rollup toplamları
+        groups = await db.daily_rollups.aggregate([
+            {"$match": {"day": {"$gte": start, "$lte": end}}},
+            {"$group": {
+                "_id": "$worker_id",
+                "production": {"$sum": "$production"},
+                "prep_minutes": {"$sum": "$prep_minutes"},
+                "work_minutes": {"$sum": "$work_minutes"},
+                **{f"pause_{reason}": {"$sum": f"$pause_minutes.{reason}"} for reason in UTILIZATION_PAUSE_REASONS},
+            }},
+        ]).to_list(None)
+        totals = {
+            group["_id"]: {
+                "production": group["production"],
+                "prep_minutes": group["prep_minutes"],
+                "work_minutes": group["work_minutes"],
+                "pause_minutes": {reason: group[f"pause_{reason}"] for reason in UTILIZATION_PAUSE_REASONS},
+            }
+            for group in groups
+        }
+        # Tek aralık geçişi: tüm elemanların süren fazları
+        for doc in await open_phase_documents(None, start, end):
+            merge_counts(totals.setdefault(doc["worker_id"], {}), doc)
+        
+        return totals
+    
+    totals = await cached_report("worker-leaderboard", {"start_date": start_date, "end_date": end_date}, start, end, build)
+    # Eleman listesi önbellekten değil her istekte güncel okunur (ekleme / silme / ad değişikliği)
+    workers = await db.users.find({"role": "worker"}, {"_id": 0, "id": 1, "username": 1, "full_name": 1}).to_list(None)
+    rows = []
+    for worker in workers:
+        worker_totals = totals.get(worker["id"], {})
+        prep_time = worker_totals.get("prep_minutes", 0)
+        work_time = worker_totals.get("work_minutes", 0)
+        pause_times = worker_totals.get("pause_minutes", {})
+        rows.append({
             "worker": worker,
+            "total_production": worker_totals.get("production", 0),
+            "total_prep_time_minutes": round(prep_time, 2),
+            "total_work_time_minutes": round(work_time, 2),
+            "total_pause_time_minutes": round(sum(pause_times.values()), 2),
+            "pause_breakdown": {f"{reason}_minutes": round(pause_times.get(reason, 0), 2) for reason in PAUSE_REASONS},
+        })
+    rows.sort(key=lambda row: row[LEADERBOARD_SORT_FIELDS[sort_by]], reverse=order == "desc")
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "sort_by": sort_by,
+        "total_workers": len(rows),
+        "workers": [{"rank": rank, **row} for rank, row in enumerate(rows[:limit] if limit else rows, start=1)],
+    }
+
+# $dateTrunc parametreleri ve dilim uzunluğu; dilimler UTC gün başına hizalıdır
+TIMESERIES_BUCKETS = {
+    "15m": ({"unit": "minute", "binSize": 15}, timedelta(minutes=15)),
+    "1h": ({"unit": "hour", "binSize": 1}, timedelta(hours=1)),
+    "1d": ({"unit": "day", "binSize": 1}, timedelta(days=1)),
+}
+MAX_TIMESERIES_BUCKETS = 5000
+
+def fill_timeseries(partials: list, start_ms: int, step_ms: int, bucket_count: int):
+    """Place (key, bucket_ms, production, events) groups into dense per-key arrays"""
+    timestamps = [start_ms + i * step_ms for i in range(bucket_count)]
+    series = {}
+    for groups in partials:
+        for key, bucket_ms, production, events in groups:
+            index = (bucket_ms - start_ms) // step_ms
+            if not 0 <= index < bucket_count:
+                continue
+            values = series.setdefault(key, {"production": [0] * bucket_count, "events": [0] * bucket_count})
+            values["production"][index] += production
+            values["events"][index] += events
+    # Tekrarlanan nesneler yerine paralel diziler: timestamps dilim başları (epoch ms),
+    # her seride zaman başına bir değer, boş dilimler 0
+    return timestamps, [{"key": key, **values} for key, values in series.items()]
+
+@api_router.get("/reports/production-timeseries")
+async def get_production_timeseries(
+    start_date: str,
+    end_date: str,
+    bucket: Literal["15m", "1h", "1d"] = "1h",
+    group_by: Literal["machine", "work_order"] = "machine",
+    machine_id: Optional[str] = None,
+    work_order_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Yetkiniz yok")
+    
+    try:
+        start = start_of_day(parse_timestamp(start_date))
+        end = min(start_of_day(parse_timestamp(end_date)) + timedelta(days=1), datetime.now(timezone.utc))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih aralığı")
+    truncate, step = TIMESERIES_BUCKETS[bucket]
+    bucket_count = -(-(end - start) // step)
+    if bucket_count > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail="Çok fazla zaman dilimi; daha büyük bir dilim ya da daha kısa bir aralık seçin")
+    # Gün parçaları tarih aralığından bağımsızdır; örtüşen aralıklar aynı parçaları kullanır
+    filters = {"bucket": bucket, "group_by": group_by, "machine_id": machine_id, "work_order_id": work_order_id}
+    params = {"start_date": start_date, "end_date": end_date, **filters}
+    
+    async def build():
+        match = {}
+        if machine_id:
+            match["machine_id"] = machine_id
+        if work_order_id:
+            tasks = await db.tasks.find({"work_order_id": work_order_id}, {"_id": 0, "id": 1}).to_list(None)
+            match["task_id"] = {"$in": [t["id"] for t in tasks]}
+        
+        async def compute(chunk_start: datetime, chunk_end: datetime) -> list:
+            pipeline = [
+                {"$match": {**match, "timestamp": {"$gte": chunk_start, "$lt": chunk_end}}},
+                {"$group": {
+                    # İş emri loglarda yok; önce göreve göre gruplanır, iş emri sonra eşlenir
+                    "_id": {
+                        "key": "$machine_id" if group_by == "machine" else "$task_id",
+                        "bucket": {"$dateTrunc": {"date": "$timestamp", "timezone": "UTC", **truncate}},
+                    },
+                    "production": {"$sum": {"$cond": [
+                        {"$eq": ["$event_type", "work_complete"]},
+                        {"$ifNull": ["$quantity_completed", 0]},
+                        0
+                    ]}},
+                    "events": {"$sum": 1},
+                }},
+            ]
+            if group_by == "work_order":
+                pipeline += [
+                    {"$lookup": {
+                        "from": "tasks",
+                        "localField": "_id.key",
+                        "foreignField": "id",
+                        "pipeline": [{"$project": {"_id": 0, "work_order_id": 1}}],
+                        "as": "task",
+                    }},
+                    {"$group": {
+                        "_id": {"key": {"$arrayElemAt": ["$task.work_order_id", 0]}, "bucket": "$_id.bucket"},
+                        "production": {"$sum": "$production"},
+                        "events": {"$sum": "$events"},
+                    }},
+                ]
+            groups = await db.work_logs.aggregate(pipeline).to_list(None)
+            return [
+                (group["_id"]["key"], int(parse_timestamp(group["_id"]["bucket"]).timestamp() * 1000), group["production"], group["events"])
+                for group in groups
+            ]
+        
+        # Dilimler gün başına hizalı olduğundan her dilim tek bir gün parçasına düşer
+        partials = await chunked_report("production-timeseries-chunk", filters, start, end, compute)
+        
+        timestamps, series = fill_timeseries(partials, int(start.timestamp() * 1000), int(step.total_seconds() * 1000), bucket_count)
+        return {"bucket": bucket, "group_by": group_by, "timestamps": timestamps, "series": series}
+    
+    report = await cached_report("production-timeseries", params, start, end - timedelta(microseconds=1), build)
+    
+    # Seri anahtarları id; etiketler ad değişikliği hemen görünsün diye sonradan eşlenir
+    keys = [item["key"] for item in report["series"]]
+    if group_by == "machine":
+        docs = await db.machines.find({"id": {"$in": keys}}, {"_id": 0, "id": 1, "code": 1, "name": 1}).to_list(None)
+        labels = {d["id"]: f"{d.get('code')} - {d.get('name')}" for d in docs}
+    else:
+        docs = await db.work_orders.find({"id": {"$in": keys}}, {"_id": 0, "id": 1, "order_no": 1, "part_name": 1}).to_list(None)
+        labels = {d["id"]: f"{d.get('order_no')} - {d.get('part_name')}" for d in docs}
+    return {
+        **report,
+        "series": sorted(
+            ({"key": item["key"], "label": labels.get(item["key"], item["key"]), **item} for item in report["series"]),
+            key=lambda item: str(item["label"])
+        ),
+    }
+
+# Makine durumu, olaydan sonraki görev durumundan türetilir; listede olmayanlar boşta sayılır
+MACHINE_STATES = ["idle", "prep", "running", "paused"]
+MACHINE_STATE_BY_TASK_STATUS = {"preparation": 1, "in_progress": 2, "paused": 3}
+EVENT_MACHINE_STATE = {
+    event_type: MACHINE_STATE_BY_TASK_STATUS.get(transition["task"], 0)
+    for event_type, transition in WORK_LOG_TRANSITIONS.items()
+}
+# Mola sebebi olmayan duraklamalar son sütuna yazılır
+UTILIZATION_PAUSE_REASONS = PAUSE_REASONS + ["unknown"]
+UNPLANNED_PAUSE_REASONS = ["failure", "material_shortage"]
+
+def machine_state_seconds(machine_index, times, states, reasons, start_ms: int, end_ms: int, machine_count: int):
+    """Seconds per machine in each state and per pause reason, computed on event columns"""
+    reason_count = len(UTILIZATION_PAUSE_REASONS)
+    if len(times) == 0:
+        return np.zeros((machine_count, len(MACHINE_STATES))), np.zeros((machine_count, reason_count))
+    
+    order = np.lexsort((times, machine_index))
+    machine_index, times, states, reasons = machine_index[order], times[order], states[order], reasons[order]
+    times = np.clip(times, start_ms, end_ms)
+    
+    next_times = np.empty_like(times)
+    next_times[:-1] = times[1:]
+    last_of_machine = np.ones(len(times), dtype=bool)
+    last_of_machine[:-1] = machine_index[1:] != machine_index[:-1]
+    next_times[last_of_machine] = end_ms
+    durations = (next_times - times) / 1000.0
+    
+    state_seconds = np.bincount(
+        machine_index * len(MACHINE_STATES) + states, weights=durations, minlength=machine_count * len(MACHINE_STATES)
+    ).reshape(machine_count, len(MACHINE_STATES))
+    paused = states == MACHINE_STATES.index("paused")
+    reason_seconds = np.bincount(
+        machine_index[paused] * reason_count + reasons[paused], weights=durations[paused], minlength=machine_count * reason_count
+    ).reshape(machine_count, reason_count)
+    return state_seconds, reason_seconds
+
+def machine_state_chunk(machine_index, times, states, reasons, start_ms: int, end_ms: int, machine_count: int) -> dict:
+    """Per-machine partial of machine_state_seconds for one chunk, independent of earlier chunks"""
+    state_seconds, reason_seconds = machine_state_seconds(machine_index, times, states, reasons, start_ms, end_ms, machine_count)
+    # İlk olaya kadarki süre (olay yoksa tüm parça) burada atanmaz; merge_machine_chunks önceki parçanın durumuna yazar
+    head_seconds = np.full(machine_count, (end_ms - start_ms) / 1000.0)
+    last_state = np.full(machine_count, -1, dtype=np.int64)
+    last_reason = np.zeros(machine_count, dtype=np.int64)
+    if len(times):
+        np.minimum.at(head_seconds, machine_index, (times - start_ms) / 1000.0)
+        order = np.lexsort((times, machine_index))
+        last_of_machine = np.ones(len(order), dtype=bool)
+        last_of_machine[:-1] = machine_index[order][1:] != machine_index[order][:-1]
+        last = order[last_of_machine]
+        last_state[machine_index[last]] = states[last]
+        last_reason[machine_index[last]] = reasons[last]
+    return {
+        "state_seconds": state_seconds, "reason_seconds": reason_seconds,
+        "head_seconds": head_seconds, "last_state": last_state, "last_reason": last_reason,
+    }
+
+def merge_machine_chunks(partials: list, seed_state, seed_reason):
+    """Combine machine_state_chunk partials in time order, starting from the state before the range"""
+    rows = np.arange(len(seed_state))
+    state_seconds = np.zeros((len(rows), len(MACHINE_STATES)))
+    reason_seconds = np.zeros((len(rows), len(UTILIZATION_PAUSE_REASONS)))
+    carry_state, carry_reason = seed_state.copy(), seed_reason.copy()
+    paused_state = MACHINE_STATES.index("paused")
+    for partial in partials:
+        state_seconds += partial["state_seconds"]
+        reason_seconds += partial["reason_seconds"]
+        head = partial["head_seconds"]
+        state_seconds[rows, carry_state] += head
+        paused = carry_state == paused_state
+        reason_seconds[rows[paused], carry_reason[paused]] += head[paused]
+        has_events = partial["last_state"] >= 0
+        carry_state[has_events] = partial["last_state"][has_events]
+        carry_reason[has_events] = partial["last_reason"][has_events]
+    return state_seconds, reason_seconds
+
+@api_router.get("/reports/machine-utilization")
+async def get_machine_utilization(
+    start_date: str,
+    end_date: str,
+    machine_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Yetkiniz yok")
+    
+    try:
+        start = start_of_day(parse_timestamp(start_date))
+        # Gelecekteki süre boşta sayılmasın
+        end = min(start_of_day(parse_timestamp(end_date)) + timedelta(days=1), datetime.now(timezone.utc))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="Geçersiz tarih aralığı")
+    
+    machine_query = {"id": machine_id} if machine_id else {}
+    machines = await db.machines.find(machine_query, {"_id": 0, "id": 1, "name": 1, "code": 1}).sort("name", ASCENDING).to_list(None)
+    position = {machine["id"]: i for i, machine in enumerate(machines)}
+    machine_ids = list(position)
+    
+    # Makine listesi değişirse (ekleme / silme / ad) önbellekteki sonuç kullanılmaz
+    machines_key = hashlib.sha1(json.dumps(machines, sort_keys=True).encode()).hexdigest()
+    unknown_reason = UTILIZATION_PAUSE_REASONS.index("unknown")
+    reason_codes = {reason: i for i, reason in enumerate(UTILIZATION_PAUSE_REASONS)}
+    
+    async def compute(chunk_start: datetime, chunk_end: datetime) -> dict:
+        logs = await db.work_logs.find(
+            {"machine_id": {"$in": machine_ids}, "timestamp": {"$gte": chunk_start, "$lt": chunk_end}},
+            {"_id": 0, "machine_id": 1, "event_type": 1, "pause_reason": 1, "timestamp": 1}
+        ).to_list(None)
+        machine_index = np.fromiter((position[log["machine_id"]] for log in logs), dtype=np.int64, count=len(logs))
+        times = np.fromiter(
+            (int(parse_timestamp(log["timestamp"]).timestamp() * 1000) for log in logs), dtype=np.int64, count=len(logs)
+        )
+        states = np.fromiter((EVENT_MACHINE_STATE[log["event_type"]] for log in logs), dtype=np.int64, count=len(logs))
+        reasons = np.fromiter(
+            (reason_codes.get(log.get("pause_reason"), unknown_reason) for log in logs), dtype=np.int64, count=len(logs)
+        )
+        return machine_state_chunk(
+            machine_index, times, states, reasons,
+            int(chunk_start.timestamp() * 1000), int(chunk_end.timestamp() * 1000), len(machines)
+        )
+    
+    # Aralık başındaki durum için her makinenin aralıktan önceki son olayı; machine_timestamp indexinde tek okuma.
+    # Önbellek anahtarına girer: aralıktan önceye sonradan yazılan bir olay kapalı günlerin sürümünü değiştirmez
+    seeds = await asyncio.gather(*(
+        db.work_logs.find_one(
+            {"machine_id": machine_id, "timestamp": {"$lt": start}},
+            {"_id": 0, "id": 1, "machine_id": 1, "event_type": 1, "pause_reason": 1},
+            sort=[("timestamp", DESCENDING)]
+        )
+        for machine_id in machine_ids
+    ))
+    seeds_key = hashlib.sha1(",".join(seed["id"] if seed else "" for seed in seeds).encode()).hexdigest()
+    
+    async def build():
+        seed_state = np.zeros(len(machines), dtype=np.int64)
+        seed_reason = np.full(len(machines), unknown_reason, dtype=np.int64)
+        for seed in seeds:
+            if seed is not None:
+                seed_state[position[seed["machine_id"]]] = EVENT_MACHINE_STATE[seed["event_type"]]
+                seed_reason[position[seed["machine_id"]]] = reason_codes.get(seed.get("pause_reason"), unknown_reason)
+        
+        # Gün parçaları ayrı ayrı (ve kapalı günler önbellekten) hesaplanıp sırayla birleştirilir
+        partials = await chunked_report("machine-utilization-chunk", {"machines": machines_key}, start, end, compute)
+        state_seconds, reason_seconds = merge_machine_chunks(partials, seed_state, seed_reason)
+        
+        start_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000)
+        period_seconds = (end_ms - start_ms) / 1000.0
+        # Boşta süresi: aralıktan diğer durumlar çıkarılınca kalan (hiç olayı olmayan makineler dahil)
+        state_seconds[:, 0] = period_seconds - state_seconds[:, 1:].sum(axis=1)
+        unplanned = reason_seconds[:, [reason_codes[r] for r in UNPLANNED_PAUSE_REASONS]].sum(axis=1)
+        utilization = state_seconds[:, MACHINE_STATES.index("running")] / period_seconds
+        availability = (period_seconds - unplanned) / period_seconds
+        
+        minutes = np.round(state_seconds / 60, 2)
+        reason_minutes = np.round(reason_seconds / 60, 2)
+        results = []
+        for i, machine in enumerate(machines):
+            results.append({
+                **machine,
+                **{f"{state}_minutes": float(minutes[i, j]) for j, state in enumerate(MACHINE_STATES)},
+                "pause_breakdown": {f"{reason}_minutes": float(reason_minutes[i, j]) for j, reason in enumerate(UTILIZATION_PAUSE_REASONS)},
+                "utilization": round(float(utilization[i]), 4),
+                "availability": round(float(availability[i]), 4),
+            })
+        
+        return {
             "start_date": start_date,
             "end_date": end_date,
+            "period_minutes": round(period_seconds / 60, 2),
+            "machines": results,
             "summary": {
-                "total_production": total_production,
-                "total_prep_time_minutes": round(prep_time, 2),
-                "total_work_time_minutes": round(work_time, 2),
-                "total_work_time_hours": round(total_work_time / 60, 2),
-                "total_pause_time_minutes": round(total_pause_time, 2),
-                "total_pause_time_hours": round(total_pause_time / 60, 2),
-                "pause_breakdown": {
-                    "break_minutes": round(pause_times["break"], 2),
-                    "failure_minutes": round(pause_times["failure"], 2),
-                    "material_shortage_minutes": round(pause_times["material_shortage"], 2),
-                    "toilet_minutes": round(pause_times["toilet"], 2),
-                    "prayer_minutes": round(pause_times["prayer"], 2),
-                    "meal_minutes": round(pause_times["meal"], 2)
-                }
-            },
-            "logs": logs
+                "utilization": round(float(utilization.mean()), 4) if len(machines) else 0,
+                "availability": round(float(availability.mean()), 4) if len(machines) else 0,
+                **{f"{state}_minutes": round(float(state_seconds[:, j].sum()) / 60, 2) for j, state in enumerate(MACHINE_STATES)},
+            }
         }
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    
+    params = {"start_date": start_date, "end_date": end_date, "machine_id": machine_id, "machines": machines_key, "seeds": seeds_key}
+    return await cached_report("machine-utilization", params, start, end - timedelta(microseconds=1), build)
 
 @api_router.post("/init-data")
 async def initialize_data():
@@ -702,58 +2171,245 @@ async def initialize_data():
     
     admin = User(
         username="admin",
-        password_hash=hash_password("admin123"),
+        password_hash=await hash_password("admin123"),
         full_name="Yönetici",
         role="admin"
     )
     admin_doc = admin.model_dump()
-    admin_doc["created_at"] = admin_doc["created_at"].isoformat()
     await db.users.insert_one(admin_doc)
     
     supervisor = User(
         username="ustabasi1",
-        password_hash=hash_password("usta123"),
+        password_hash=await hash_password("usta123"),
         full_name="Ahmet Yılmaz",
         role="supervisor"
     )
     supervisor_doc = supervisor.model_dump()
-    supervisor_doc["created_at"] = supervisor_doc["created_at"].isoformat()
     await db.users.insert_one(supervisor_doc)
     
     worker1 = User(
         username="eleman1",
-        password_hash=hash_password("eleman123"),
+        password_hash=await hash_password("eleman123"),
         full_name="Mehmet Demir",
         role="worker"
     )
     worker1_doc = worker1.model_dump()
-    worker1_doc["created_at"] = worker1_doc["created_at"].isoformat()
     await db.users.insert_one(worker1_doc)
     
     worker2 = User(
         username="eleman2",
-        password_hash=hash_password("eleman123"),
+        password_hash=await hash_password("eleman123"),
         full_name="Ali Kaya",
         role="worker"
     )
     worker2_doc = worker2.model_dump()
-    worker2_doc["created_at"] = worker2_doc["created_at"].isoformat()
     await db.users.insert_one(worker2_doc)
     
     machine1 = Machine(name="Torna 1", code="T001")
     machine1_doc = machine1.model_dump()
-    machine1_doc["created_at"] = machine1_doc["created_at"].isoformat()
     await db.machines.insert_one(machine1_doc)
     
     machine2 = Machine(name="Torna 2", code="T002")
     machine2_doc = machine2.model_dump()
-    machine2_doc["created_at"] = machine2_doc["created_at"].isoformat()
     await db.machines.insert_one(machine2_doc)
+    await bump_versions("users", "machines")
     
     return {"message": "Demo veriler oluşturuldu", "admin": {"username": "admin", "password": "admin123"}, "supervisor": {"username": "ustabasi1", "password": "usta123"}, "worker": {"username": "eleman1", "password": "eleman123"}}
 
+# (koleksiyon, anahtarlar, seçenekler) - server.py içindeki sorgu şekillerine göre
+INDEXES = [
+    ("users", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    ("users", [("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+    ("users", [("role", ASCENDING)], {"name": "role"}),
+    ("machines", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    ("machines", [("code", ASCENDING)], {"name": "code_unique", "unique": True}),
+    ("work_orders", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    ("tasks", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    ("tasks", [("assigned_worker_id", ASCENDING), ("status", ASCENDING)], {"name": "assigned_worker_status"}),
+    ("tasks", [("work_order_id", ASCENDING), ("status", ASCENDING)], {"name": "work_order_status"}),
+    ("tasks", [("machine_id", ASCENDING), ("status", ASCENDING)], {"name": "machine_status"}),
+    ("tasks", [("status", ASCENDING)], {"name": "status"}),
+    ("work_logs", [("id", ASCENDING)], {"name": "id_unique", "unique": True}),
+    ("work_logs", [("task_id", ASCENDING), ("timestamp", ASCENDING)], {"name": "task_timestamp"}),
+    ("work_logs", [("worker_id", ASCENDING), ("timestamp", ASCENDING)], {"name": "worker_timestamp"}),
+    ("work_logs", [("timestamp", DESCENDING)], {"name": "timestamp"}),
+    ("work_logs", [("machine_id", ASCENDING), ("timestamp", ASCENDING)], {"name": "machine_timestamp"}),
+    ("daily_rollups", [("day", ASCENDING), ("machine_id", ASCENDING), ("worker_id", ASCENDING)], {"name": "day_machine_worker_unique", "unique": True}),
+    ("daily_rollups", [("worker_id", ASCENDING), ("day", ASCENDING)], {"name": "worker_day"}),
+    ("idempotency_keys", [("scope", ASCENDING), ("key", ASCENDING)], {"name": "scope_key_unique", "unique": True}),
+    ("idempotency_keys", [("created_at", ASCENDING)], {"name": "created_at_ttl", "expireAfterSeconds": IDEMPOTENCY_TTL_SECONDS}),
+]
+
+def index_spec(keys, options: dict) -> tuple:
+    """(keys, unique, TTL) of an index, comparable between INDEXES and index_information()"""
+    return (
+        tuple((field, int(direction)) for field, direction in keys),
+        bool(options.get("unique")),
+        options.get("expireAfterSeconds"),
+    )
+
+async def ensure_indexes() -> List[str]:
+    """Create missing indexes and return the ones created by this call"""
+    created = []
+    existing_by_collection = {}
+    for collection_name, keys, options in INDEXES:
+        collection = db[collection_name]
+        if collection_name not in existing_by_collection:
+            existing_by_collection[collection_name] = await collection.index_information()
+        existing = existing_by_collection[collection_name]
+        name = options["name"]
+        wanted = index_spec(keys, options)
+        
+        # Aynı isimde ya da aynı anahtarlarda (ör. eski, unique olmayan id_1) mevcut index
+        current_name = name if name in existing else next(
+            (other for other, info in existing.items() if index_spec(info["key"], {})[0] == wanted[0]), None
+        )
+        if current_name is not None:
+            current = index_spec(existing[current_name]["key"], existing[current_name])
+            if current == wanted:
+                continue
+            if current_name == name and current[:2] == wanted[:2] and None not in (current[2], wanted[2]):
+                try:
+                    await db.command("collMod", collection_name, index={"name": name, "expireAfterSeconds": wanted[2]})
+                    logger.info(f"Index TTL güncellendi {collection_name}.{name}: {current[2]} -> {wanted[2]} sn")
+                    existing[name]["expireAfterSeconds"] = wanted[2]
+                except OperationFailure as e:
+                    logger.error(f"Index TTL güncellenemedi {collection_name}.{name}: {e}")
+                continue
+            logger.error(
+                f"Index {collection_name}.{name} eksik: '{current_name}' index'i farklı seçeneklerle mevcut "
+                f"(mevcut {current}, beklenen {wanted}); eski index elle silinmeli"
+            )
+            continue
+        
+        try:
+            await collection.create_index(keys, **options)
+        except OperationFailure as e:
+            # 85/86: çakışan index. Yarışı kaybeden worker için aynı index artık mevcuttur
+            if e.code in (85, 86):
+                info = (await collection.index_information()).get(name)
+                if info is not None and index_spec(info["key"], info) == wanted:
+                    continue
+            logger.error(f"Index oluşturulamadı {collection_name}.{name}: {e}")
+            continue
+        existing[name] = {"key": keys, **options}
+        created.append(f"{collection_name}.{name}")
+    return created
+
+# Zaten kodlanmış ya da olay akışı olan yanıtlar olduğu gibi geçer
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/gzip")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; flush pushes buffered output so the client sees it now"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+        return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+    
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+class CompressionMiddleware:
+    """Negotiated brotli / gzip compression for HTTP responses"""
+    def __init__(self, app, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        compressor = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                media_type = headers.get("content-type", "").split(";")[0].strip()
+                if (
+                    "content-encoding" in headers
+                    or media_type in UNCOMPRESSED_MEDIA_TYPES
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                
+                compressor = StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+            
+            if more_body:
+                await send({"type": "http.response.body", "body": compressor.compress(body, flush=True), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.compress(body) + compressor.finish()})
+        
+        await self.app(scope, receive, send_compressed)
+
 app.include_router(api_router)
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    gzip_level=GZIP_COMPRESS_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -768,6 +2424,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+WORK_ORDER_COUNTERS = ["open_task_count", "completed_task_count", "completed_quantity"]
+
+async def backfill_work_order_counters() -> int:
+    """Initialise task counters on work orders created before they existed"""
+    any_missing = {"$or": [{field: {"$exists": False}} for field in WORK_ORDER_COUNTERS]}
+    missing = await db.work_orders.find(any_missing, {"_id": 0, "id": 1}).to_list(None)
+    if not missing:
+        return 0
+    order_ids = [w["id"] for w in missing]
+    pipeline = [
+        {"$match": {"work_order_id": {"$in": order_ids}}},
+        {"$group": {
+            "_id": "$work_order_id",
+            "open_task_count": {"$sum": {"$cond": [{"$in": ["$status", ["completed", "cancelled"]]}, 0, 1]}},
+            "completed_task_count": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+            "completed_quantity": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, {"$ifNull": ["$quantity_completed", 0]}, 0]}},
+        }},
+    ]
+    counts = {row["_id"]: row async for row in db.tasks.aggregate(pipeline)}
+    operations = []
+    for order_id in order_ids:
+        row = counts.get(order_id, {})
+        # Her sayaç yalnızca hâlâ yoksa yazılır; bu arada canlı $inc ile oluşmuş sayaç ezilmez
+        operations.extend(
+            UpdateOne({"id": order_id, field: {"$exists": False}}, {"$set": {field: row.get(field, 0)}})
+            for field in WORK_ORDER_COUNTERS
+        )
+    result = await db.work_orders.bulk_write(operations, ordered=False)
+    await bump_versions("work_orders")
+    return result.modified_count
+
+async def detect_transaction_support() -> bool:
+    if MONGO_TRANSACTIONS in ("on", "off"):
+        return MONGO_TRANSACTIONS == "on"
+    try:
+        hello = await client.admin.command("hello")
+    except Exception as e:
+        logger.warning(f"MongoDB topolojisi okunamadı, transaction kapalı: {e}")
+        return False
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+@app.on_event("startup")
+async def configure_transactions():
+    global transactions_supported
+    transactions_supported = await detect_transaction_support()
+    logger.info(f"Multi-document transaction: {'açık' if transactions_supported else 'kapalı'}")
+    if not transactions_supported:
+        logger.warning("Transaction yok: iş kaydı yazımları atomik değil; görev güncellemesinden sonraki bir yazım hata verirse olay kısmen uygulanmış kalır")
+
+@app.on_event("startup")
+async def create_indexes():
+    created = await ensure_indexes()
+    if created:
+        logger.info(f"Oluşturulan indexler: {', '.join(created)}")
+    else:
+        logger.info("Tüm indexler mevcut")
+
+@app.on_event("startup")
+async def initialise_work_order_counters():
+    updated = await backfill_work_order_counters()
+    if updated:
+        logger.info(f"İş emirlerinde {updated} eksik görev sayacı oluşturuldu")
+
+@app.on_event("startup")
+async def check_daily_rollups():
+    # Rollup'lar otomatik oluşturulmaz; boşsa raporlar tüm geçmiş için sıfır döner
+    if await db.daily_rollups.find_one({}, {"_id": 1}) is None and await db.work_logs.find_one({}, {"_id": 1}) is not None:
+        logger.error("daily_rollups boş ama work_logs dolu: raporlar sıfır döner. Önce migrate_datetimes.py, sonra rebuild_rollups.py çalıştırın")
+
+async def poll_user_changes(last_version: Optional[int]) -> int:
+    """Clear user_cache if the users version moved since last_version; return the current version"""
+    version = (await get_versions()).get("users", 0)
+    if last_version is not None and version != last_version:
+        user_cache.clear()
+    return version
+
+async def watch_live_snapshot():
+    """Keep the live status snapshot and user_cache in sync with writes from other worker processes"""
+    # Başlangıçta MongoDB'ye ulaşılamazsa ilk yükleme tekrar denenir; görev sessizce bitmez
+    while True:
+        try:
+            await live_snapshot.rebuild()
+            break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Canlı durum yüklenemedi, {LIVE_SNAPSHOT_POLL_SECONDS:g} sn sonra tekrar denenecek: {e}")
+            await asyncio.sleep(LIVE_SNAPSHOT_POLL_SECONDS)
+    pipeline = [{"$match": {"ns.coll": {"$in": ["machines", "tasks", "work_orders", "users"]}}}]
+    try:
+        async with db.watch(pipeline) as stream:
+            logger.info("Canlı durum change stream ile senkronize ediliyor")
+            async for change in stream:
+                # Aynı anda gelen değişiklikler tek yeniden yüklemede toplanır
+                changes = [change]
+                while (change := await stream.try_next()) is not None:
+                    changes.append(change)
+                # Silinen veya değişen kullanıcı bu süreçte de hemen geçersiz olur
+                if any(c["ns"]["coll"] == "users" for c in changes):
+                    user_cache.clear()
+                if await live_snapshot.rebuild():
+                    event_broker.publish({"type": "snapshot_updated"})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.info(f"Change stream kullanılamıyor ({e}); canlı durum {LIVE_SNAPSHOT_POLL_SECONDS:g} sn'de bir yenilenecek")
+    
+    users_version = None
+    while True:
+        try:
+            users_version = await poll_user_changes(users_version)
+        except Exception as e:
+            logger.error(f"Kullanıcı sürümü okunamadı: {e}")
+        await asyncio.sleep(LIVE_SNAPSHOT_POLL_SECONDS)
+        try:
+            if await live_snapshot.rebuild():
+                event_broker.publish({"type": "snapshot_updated"})
+        except Exception as e:
+            logger.error(f"Canlı durum yenilenemedi: {e}")
+
+live_snapshot_watcher = None
+
+def log_watcher_exit(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Canlı durum senkronizasyonu durdu", exc_info=task.exception())
+
+@app.on_event("startup")
+async def start_live_snapshot():
+    global live_snapshot_watcher
+    live_snapshot_watcher = asyncio.create_task(watch_live_snapshot())
+    live_snapshot_watcher.add_done_callback(log_watcher_exit)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if live_snapshot_watcher:
+        live_snapshot_watcher.cancel()
+    client.close()
+    password_executor.shutdown(wait=False)
\ No newline at end of file
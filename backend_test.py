@@ -354,13 +354,57 @@ class MESAPITester:
                     })
                     success, _, status = self.make_request('POST', 'work-logs', self.worker_token, log_data)
                     self.log_test("Create work log (work complete)", success)
-                    
+
+                    # Repeated completion (tablet retry) must not change counters again
+                    success, _, status = self.make_request('POST', 'work-logs', self.worker_token, log_data)
+                    self.log_test("Reject repeated work complete", status == 409)
+
                     # Get task logs
                     success, logs, status = self.make_request('GET', f"work-logs/task/{task_id}", self.worker_token)
                     self.log_test("Get task work logs", success and isinstance(logs, list))
 
         return True
 
+    def test_work_log_batch(self):
+        """Test batch work-log ingestion"""
+        print("\n📦 Testing work-log batch ingestion...")
+
+        success, result, status = self.make_request('POST', 'work-logs/batch', self.worker_token, [
+            {"task_id": "missing-task", "event_type": "prep_start", "timestamp": datetime.now().isoformat()}
+        ])
+        self.log_test("Batch with unknown task", success and result.get('rejected') == 1 and result.get('accepted') == 0,
+                      f"Status: {status}")
+
+        return success
+
+    def test_pagination(self):
+        """Test cursor-based pagination on list endpoints"""
+        print("\n📄 Testing pagination...")
+
+        success, all_machines, status = self.make_request('GET', 'machines', self.admin_token)
+        if not success:
+            self.log_test("Paginate machines", False, f"Status: {status}")
+            return False
+
+        collected = []
+        cursor = None
+        while True:
+            endpoint = 'machines?limit=2' + (f'&after={cursor}' if cursor else '')
+            success, page, status = self.make_request('GET', endpoint, self.admin_token)
+            if not success or 'items' not in page:
+                self.log_test("Paginate machines", False, f"Status: {status}")
+                return False
+            collected.extend(m['id'] for m in page['items'])
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+        self.log_test("Paginate machines", collected == [m['id'] for m in all_machines])
+
+        success, _, status = self.make_request('GET', 'tasks?limit=2&after=invalid', self.admin_token)
+        self.log_test("Invalid cursor rejected", not success and status == 400)
+
+        return True
+
     def test_live_monitoring(self):
         """Test live monitoring dashboard"""
         print("\n📊 Testing live monitoring...")
@@ -382,7 +426,13 @@ class MESAPITester:
         # Test unauthorized report access (worker)
         success, _, status = self.make_request('GET', f'reports/daily?date={today}', self.worker_token)
         self.log_test("Unauthorized report access blocked", not success and status == 403)
-        
+
+        # Test machine utilization report
+        success, utilization, status = self.make_request('GET', f'reports/machine-utilization?start_date={today}&end_date={today}', self.admin_token)
+        self.log_test("Get machine utilization report", success and all(
+            0 <= m['utilization'] <= 1 and 0 <= m['availability'] <= 1 for m in utilization.get('machines', [])
+        ))
+
         return True
 
     def cleanup_test_data(self):
@@ -436,6 +486,8 @@ class MESAPITester:
             self.test_work_order_management,
             self.test_task_management,
             self.test_worker_functionality,
+            self.test_work_log_batch,
+            self.test_pagination,
             self.test_live_monitoring,
             self.test_reporting
         ]
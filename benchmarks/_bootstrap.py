@@ -0,0 +1,17 @@
+"""Shared setup for scripts that import backend/server.py directly (benchmarks and tests)"""
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def use_backend(db_name="fethmes_benchmark", **env):
+    """Put backend/ on sys.path and give server.py the settings it reads at import time"""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    # Motor istemcisi bağlantıyı ilk sorguda açar; import için çalışan bir MongoDB gerekmez
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", db_name)
+    for name, value in env.items():
+        os.environ.setdefault(name, value)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Response compression benchmark
+
+Temsili rapor yükleri (loglu haftalık rapor, tam görev listesi, küçük canlı
+durum yanıtı) için gzip ve brotli seviyelerinde sıkıştırılmış boyutu,
+sıkıştırma süresini ve verilen bağlantı hızında tahmini aktarım süresini
+(sıkıştırma + aktarım) karşılaştırır. COMPRESSION_MIN_SIZE, GZIP_COMPRESS_LEVEL
+ve BROTLI_QUALITY ayarlarını seçmek için kullanılır. Veritabanı gerekmez.
+
+Kullanım:
+    python benchmarks/compression.py --logs 20000 --tasks 5000 --link-mbps 2
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from _bootstrap import use_backend
+
+use_backend()
+
+from server import StreamCompressor, dumps_json  # noqa: E402
+
+EVENT_TYPES = ["prep_start", "prep_end", "work_start", "work_pause", "work_resume", "work_complete"]
+PAUSE_REASONS = ["break", "failure", "material_shortage", "toilet", "prayer", "meal"]
+SETTINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 8)]
+
+
+def weekly_report(log_count, rng):
+    base = datetime(2026, 1, 5, 6, tzinfo=timezone.utc)
+    workers = [str(uuid.uuid4()) for _ in range(40)]
+    machines = [str(uuid.uuid4()) for _ in range(25)]
+    logs = []
+    for i in range(log_count):
+        event_type = rng.choice(EVENT_TYPES)
+        logs.append({
+            "id": str(uuid.uuid4()),
+            "task_id": str(uuid.uuid4()),
+            "worker_id": rng.choice(workers),
+            "machine_id": rng.choice(machines),
+            "event_type": event_type,
+            "timestamp": base + timedelta(seconds=i * 30),
+            "pause_reason": rng.choice(PAUSE_REASONS) if event_type == "work_pause" else None,
+            "quantity_completed": rng.randint(1, 100) if event_type == "work_complete" else None,
+            "notes": None,
+        })
+    return {"start_date": "2026-01-05", "end_date": "2026-01-11", "total_logs": log_count, "logs": logs}
+
+
+def task_list(task_count, rng):
+    base = datetime(2026, 1, 5, 6, tzinfo=timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "work_order_id": str(uuid.uuid4()),
+        "machine_id": str(uuid.uuid4()),
+        "assigned_worker_id": None,
+        "assigned_by": str(uuid.uuid4()),
+        "status": rng.choice(["assigned", "in_progress", "completed"]),
+        "quantity_assigned": rng.randint(10, 500),
+        "quantity_completed": 0,
+        "assigned_at": base + timedelta(minutes=i),
+    } for i in range(task_count)]
+
+
+def live_status(rng):
+    return [{"machine": {"id": str(uuid.uuid4()), "code": f"T{i:03d}", "status": "running"}} for i in range(3)]
+
+
+def measure(body, encoding, level, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressor = StreamCompressor(encoding, level, level)
+        compressed = compressor.compress(body) + compressor.finish()
+        timings.append(time.perf_counter() - started)
+    return len(compressed), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=20000)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--link-mbps", type=float, default=2.0, help="tablet bağlantı hızı")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    payloads = {
+        "weekly report + logs": dumps_json(weekly_report(args.logs, rng)),
+        "tasks list": dumps_json(task_list(args.tasks, rng)),
+        "live status (small)": dumps_json(live_status(rng)),
+    }
+    bytes_per_second = args.link_mbps * 1_000_000 / 8
+
+    for name, body in payloads.items():
+        raw_transfer = len(body) / bytes_per_second
+        print(f"\n{name}: {len(body):,} bytes, transfer {raw_transfer * 1000:,.0f} ms uncompressed")
+        print(f"  {'setting':<10}{'bytes':>12}{'ratio':>8}{'compress ms':>14}{'total ms':>12}")
+        for encoding, level in SETTINGS:
+            size, seconds = measure(body, encoding, level, args.repeat)
+            total = seconds + size / bytes_per_second
+            setting = f"{encoding} {level}"
+            print(f"  {setting:<10}{size:>12,}{len(body) / size:>8.1f}{seconds * 1000:>14.2f}{total * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+JSON response encoding benchmark
+
+10k belgelik görev / work log listesi üzerinde eski yolu (özyinelemeli
+serialize_doc + jsonable_encoder + JSONResponse) FastJSONResponse ile
+karşılaştırır. Her yol için medyan süre ve çıktının boyutu yazdırılır;
+iki yolun ürettiği JSON içerik olarak aynı olmalıdır.
+
+Kullanım:
+    python benchmarks/json_encoding.py --documents 10000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from _bootstrap import use_backend
+
+use_backend()
+
+from server import FastJSONResponse, serialize_doc  # noqa: E402
+
+
+def legacy_serialize_doc(doc):
+    """serialize_doc as it was before FastJSONResponse"""
+    if doc is None:
+        return None
+    if isinstance(doc, list):
+        return [legacy_serialize_doc(item) for item in doc]
+    if isinstance(doc, dict):
+        result = {}
+        for key, value in doc.items():
+            if key == '_id':
+                continue
+            elif isinstance(value, ObjectId):
+                result[key] = str(value)
+            elif isinstance(value, datetime):
+                result[key] = value.isoformat()
+            elif isinstance(value, (dict, list)):
+                result[key] = legacy_serialize_doc(value)
+            else:
+                result[key] = value
+        return result
+    return doc
+
+
+def make_documents(count):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "work_order_id": str(uuid.uuid4()),
+        "machine_id": str(uuid.uuid4()),
+        "assigned_by": str(uuid.uuid4()),
+        "status": "in_progress",
+        "quantity_assigned": 100,
+        "quantity_completed": i % 100,
+        "assigned_at": base + timedelta(minutes=i),
+        "last_event_at": base + timedelta(minutes=i, seconds=30),
+        "pause_reason": None,
+        "timing": {"started_at": base + timedelta(minutes=i), "pause_seconds": 12.5},
+    } for i in range(count)]
+
+
+def legacy_path(docs):
+    return JSONResponse(jsonable_encoder(legacy_serialize_doc(docs))).body
+
+
+def fast_path(docs):
+    return FastJSONResponse(serialize_doc(docs)).body
+
+
+def measure(fn, docs, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(docs)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_documents(args.documents)
+    legacy_time, legacy_body = measure(legacy_path, docs, args.repeat)
+    fast_time, fast_body = measure(fast_path, docs, args.repeat)
+    assert json.loads(legacy_body) == json.loads(fast_body), "çıktılar farklı"
+
+    print(f"documents={args.documents} repeat={args.repeat}")
+    print(f"legacy  median={legacy_time * 1000:8.2f} ms  bytes={len(legacy_body):,}")
+    print(f"fast    median={fast_time * 1000:8.2f} ms  bytes={len(fast_body):,}")
+    print(f"speedup x{legacy_time / fast_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+
+Vardiya değişimini taklit eder: çok sayıda eşzamanlı login yapılırken
+/machines endpoint'i sürekli yoklanır ve gecikmesi ölçülür. bcrypt event
+loop'u blokluyorsa yoklama gecikmeleri login süresi kadar uzar.
+
+Kullanım:
+    API_URL=http://localhost:8001/api python benchmarks/login_throughput.py --logins 100 --concurrency 20
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_URL = os.environ.get("API_URL", "http://localhost:8001/api")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(latencies):
+    return f"p50 {statistics.median(latencies) * 1000:8.1f} ms   p99 {percentile(latencies, 99) * 1000:8.1f} ms"
+
+
+def login(username, password):
+    started = time.perf_counter()
+    response = requests.post(f"{API_URL}/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def probe(headers, stop_event, latencies, interval):
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        requests.get(f"{API_URL}/machines", headers=headers)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--username", default="eleman1")
+    parser.add_argument("--password", default="eleman123")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    token = requests.post(f"{API_URL}/auth/login", json={"username": "admin", "password": "admin123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Login yokken referans gecikme
+    idle_latencies = []
+    for _ in range(20):
+        started = time.perf_counter()
+        requests.get(f"{API_URL}/machines", headers=headers)
+        idle_latencies.append(time.perf_counter() - started)
+
+    stop_event = threading.Event()
+    busy_latencies = []
+    prober = threading.Thread(target=probe, args=(headers, stop_event, busy_latencies, args.probe_interval))
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        login_latencies = list(pool.map(lambda _: login(args.username, args.password), range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    stop_event.set()
+    prober.join()
+
+    print(f"Target: {API_URL}")
+    print(f"Logins: {args.logins} (concurrency {args.concurrency}) in {elapsed:.2f}s -> {args.logins / elapsed:.1f} login/s")
+    print(f"Login latency   {summary(login_latencies)}")
+    print(f"/machines idle  {summary(idle_latencies)}")
+    if busy_latencies:
+        print(f"/machines busy  {summary(busy_latencies)}   max {max(busy_latencies) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
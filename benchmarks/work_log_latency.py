@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Work-log write latency benchmark
+
+Her iterasyonda yeni bir görev açar ve prep_start -> work_complete olay
+zincirini POST /work-logs ile gönderir; olay tipi başına p50 / p99
+gecikmeyi raporlar. Değişiklik öncesi ve sonrası ölçüm için aynı komutu
+iki sunucu sürümüne karşı çalıştırıp --label ile etiketleyin.
+
+Kullanım:
+    API_URL=http://localhost:8001/api python benchmarks/work_log_latency.py --iterations 200 --label after
+"""
+import argparse
+import os
+import statistics
+import time
+from collections import defaultdict
+
+import requests
+
+API_URL = os.environ.get("API_URL", "http://localhost:8001/api")
+
+EVENTS = [
+    {"event_type": "prep_start"},
+    {"event_type": "prep_end"},
+    {"event_type": "work_start"},
+    {"event_type": "work_pause", "pause_reason": "break"},
+    {"event_type": "work_resume"},
+    {"event_type": "work_complete"},
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def login(session, username, password):
+    response = session.post(f"{API_URL}/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--quantity", type=int, default=10)
+    parser.add_argument(
+        "--partial", type=int, default=7, help="work_complete miktarı; < quantity ise kalan için yeni görev açılır"
+    )
+    parser.add_argument("--label", default="")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    admin = login(session, "admin", "admin123")
+    supervisor = login(session, "ustabasi1", "usta123")
+    worker = login(session, "eleman1", "eleman123")
+
+    machine = session.get(f"{API_URL}/machines", headers=admin).json()[0]
+    work_order = session.post(f"{API_URL}/work-orders", headers=admin, json={
+        "order_no": f"BENCH-{int(time.time())}",
+        "part_name": "Benchmark",
+        "quantity": args.iterations * args.quantity
+    }).json()
+
+    latencies = defaultdict(list)
+    for _ in range(args.iterations):
+        task = session.post(f"{API_URL}/tasks", headers=supervisor, json={
+            "work_order_id": work_order["id"],
+            "machine_id": machine["id"],
+            "quantity_assigned": args.quantity
+        }).json()
+        for event in EVENTS:
+            payload = {"task_id": task["id"], **event}
+            if event["event_type"] == "work_complete":
+                payload["quantity_completed"] = args.partial
+            started = time.perf_counter()
+            response = session.post(f"{API_URL}/work-logs", headers=worker, json=payload)
+            latencies[event["event_type"]].append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    print(f"Target: {API_URL} {args.label}".rstrip())
+    print(f"{'event':<15}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for event in EVENTS:
+        values = latencies[event["event_type"]]
+        p50, p99 = statistics.median(values) * 1000, percentile(values, 99) * 1000
+        print(f"{event['event_type']:<15}{len(values):>6}{p50:>10.1f}{p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
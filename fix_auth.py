@@ -67,7 +67,7 @@ async def fix_users():
         user_doc = {
             **user_data,
             "password_hash": password_hash,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         
         await db.users.insert_one(user_doc)
@@ -0,0 +1,19 @@
+import axios from 'axios';
+
+const API_URL = process.env.REACT_APP_BACKEND_URL + '/api';
+const PAGE_SIZE = 500;
+
+// Liste uçları cursor ile sayfa sayfa okunur; tek istek tüm koleksiyonu yüklemez
+export async function fetchAllPages(path, token, params = {}) {
+  const items = [];
+  let after = null;
+  do {
+    const response = await axios.get(`${API_URL}${path}`, {
+      headers: { Authorization: `Bearer ${token}` },
+      params: { ...params, limit: PAGE_SIZE, ...(after ? { after } : {}) }
+    });
+    items.push(...response.data.items);
+    after = response.data.next_cursor;
+  } while (after);
+  return items;
+}
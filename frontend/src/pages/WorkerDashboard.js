@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
@@ -63,18 +64,17 @@ export default function WorkerDashboard({ user, token, onLogout }) {
         const task = activeTasks[0];
         setSelectedTask(task);
         
-        const [machineRes, workOrderRes, logsRes] = await Promise.all([
-          axios.get(`${API_URL}/machines`, { headers: { Authorization: `Bearer ${token}` } }),
-          axios.get(`${API_URL}/work-orders`, { headers: { Authorization: `Bearer ${token}` } }),
-          axios.get(`${API_URL}/work-logs/task/${task.id}`, { headers: { Authorization: `Bearer ${token}` } })
+        const [machinesList, ordersList, logs] = await Promise.all([
+          fetchAllPages('/machines', token),
+          fetchAllPages('/work-orders', token),
+          fetchAllPages(`/work-logs/task/${task.id}`, token)
         ]);
         
-        const machine = machineRes.data.find(m => m.id === task.machine_id);
-        const wo = workOrderRes.data.find(w => w.id === task.work_order_id);
+        const machine = machinesList.find(m => m.id === task.machine_id);
+        const wo = ordersList.find(w => w.id === task.work_order_id);
         setSelectedMachine(machine);
         setWorkOrder(wo);
         
-        const logs = logsRes.data;
         if (logs.length > 0) {
           const lastLog = logs[logs.length - 1];
           if (lastLog.event_type === 'prep_start' || lastLog.event_type === 'work_start' || lastLog.event_type === 'work_resume') {
@@ -85,10 +85,7 @@ export default function WorkerDashboard({ user, token, onLogout }) {
           }
         }
       } else {
-        const machinesRes = await axios.get(`${API_URL}/machines`, {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        setMachines(machinesRes.data);
+        setMachines(await fetchAllPages('/machines', token));
       }
     } catch (error) {
       toast.error('Veri yüklenemedi');
@@ -101,16 +98,12 @@ export default function WorkerDashboard({ user, token, onLogout }) {
 
   const handleSelectMachine = async (machine) => {
     try {
-      const [tasksRes, ordersRes] = await Promise.all([
-        axios.get(`${API_URL}/tasks`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/work-orders`, { headers: { Authorization: `Bearer ${token}` } })
+      const [assignedTasks, ordersList] = await Promise.all([
+        fetchAllPages('/tasks', token, { machine_id: machine.id, status: 'assigned' }),
+        fetchAllPages('/work-orders', token)
       ]);
       
-      const machineTasks = tasksRes.data.filter(t => 
-        t.machine_id === machine.id && 
-        t.status === 'assigned' &&
-        !t.current_worker_id
-      );
+      const machineTasks = assignedTasks.filter(t => !t.current_worker_id);
       
       if (machineTasks.length === 0) {
         toast.error('Bu makinede boş iş yok');
@@ -120,7 +113,7 @@ export default function WorkerDashboard({ user, token, onLogout }) {
       // Tüm işleri kaydet
       setSelectedMachine(machine);
       setAvailableTasks(machineTasks);
-      setWorkOrder(ordersRes.data);
+      setWorkOrder(ordersList);
     } catch (error) {
       toast.error('İş yüklenemedi');
     }
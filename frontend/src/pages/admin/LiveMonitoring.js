@@ -1,14 +1,21 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL + '/api';
+// Olay akışı koparsa yedek yenileme aralığı
+const FALLBACK_REFRESH_MS = 60000;
+const STREAM_RECONNECT_MS = 3000;
 
 export default function LiveMonitoring({ token }) {
   const [machineStatus, setMachineStatus] = useState([]);
-  const [workLogs, setWorkLogs] = useState({});
   const [loading, setLoading] = useState(true);
+  const [lastUpdated, setLastUpdated] = useState(null);
+  // Süre sayaçları olay gelmese de her saniye ilerler (ağ isteği yapmaz)
+  const [now, setNow] = useState(Date.now());
+  const refreshTimer = useRef(null);
+  const reconnectTimer = useRef(null);
 
   const fetchLiveStatus = async () => {
     try {
@@ -16,21 +23,7 @@ export default function LiveMonitoring({ token }) {
         headers: { Authorization: `Bearer ${token}` }
       });
       setMachineStatus(response.data);
-      
-      const logsMap = {};
-      for (const item of response.data) {
-        if (item.task) {
-          try {
-            const logsRes = await axios.get(`${API_URL}/work-logs/task/${item.task.id}`, {
-              headers: { Authorization: `Bearer ${token}` }
-            });
-            logsMap[item.task.id] = logsRes.data;
-          } catch (err) {
-            console.error('Log yüklenemedi:', err);
-          }
-        }
-      }
-      setWorkLogs(logsMap);
+      setLastUpdated(new Date());
     } catch (error) {
       console.error('Canlı durum yüklenemedi:', error);
     } finally {
@@ -40,10 +33,47 @@ export default function LiveMonitoring({ token }) {
 
   useEffect(() => {
     fetchLiveStatus();
-    const interval = setInterval(fetchLiveStatus, 5000);
-    return () => clearInterval(interval);
+
+    // Sunucu durum değişikliklerini SSE ile iter; art arda gelen olaylar tek yenilemede toplanır.
+    // Akış token'ı kısa ömürlüdür; bağlantı koparsa yeni token ile yeniden bağlanılır
+    let events = null;
+    let closed = false;
+    const connect = async () => {
+      try {
+        const response = await axios.post(`${API_URL}/events/stream-token`, {}, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (closed) return;
+        events = new EventSource(`${API_URL}/events/stream?token=${encodeURIComponent(response.data.token)}`);
+        events.onmessage = () => {
+          clearTimeout(refreshTimer.current);
+          refreshTimer.current = setTimeout(fetchLiveStatus, 250);
+        };
+        events.onerror = () => {
+          events.close();
+          if (!closed) reconnectTimer.current = setTimeout(connect, STREAM_RECONNECT_MS);
+        };
+      } catch (error) {
+        if (!closed) reconnectTimer.current = setTimeout(connect, FALLBACK_REFRESH_MS);
+      }
+    };
+    connect();
+    const interval = setInterval(fetchLiveStatus, FALLBACK_REFRESH_MS);
+
+    return () => {
+      closed = true;
+      if (events) events.close();
+      clearInterval(interval);
+      clearTimeout(refreshTimer.current);
+      clearTimeout(reconnectTimer.current);
+    };
   }, [token]);
 
+  useEffect(() => {
+    const interval = setInterval(() => setNow(Date.now()), 1000);
+    return () => clearInterval(interval);
+  }, []);
+
   const getStatusBadge = (status) => {
     const statusConfig = {
       running: { label: 'Çalışıyor', className: 'bg-green-500/20 text-green-400 border-green-500/50' },
@@ -65,19 +95,11 @@ export default function LiveMonitoring({ token }) {
     return classes[status] || classes.idle;
   };
 
-  const calculateDuration = (logs, task) => {
-    if (!logs || logs.length === 0) return { phase: '', duration: '0:00' };
-    
-    const lastLog = logs[logs.length - 1];
-    const startLog = logs.find(l => 
-      l.event_type === 'prep_start' || l.event_type === 'work_start' || l.event_type === 'work_resume'
-    );
-    
-    if (!startLog) return { phase: '', duration: '0:00' };
+  const calculateDuration = (timing, task) => {
+    if (!timing || !timing.started_at) return { phase: '', duration: '0:00' };
     
-    const start = new Date(startLog.timestamp);
-    const now = new Date();
-    const diffMs = now - start;
+    const start = new Date(timing.started_at);
+    const diffMs = Math.max(0, now - start);
     const diffMins = Math.floor(diffMs / 60000);
     const diffSecs = Math.floor((diffMs % 60000) / 1000);
     
@@ -106,7 +128,7 @@ export default function LiveMonitoring({ token }) {
         </div>
         <div className="text-right">
           <p className="text-sm text-muted-foreground">Son Güncelleme</p>
-          <p className="text-lg font-mono font-bold text-primary">{new Date().toLocaleTimeString('tr-TR')}</p>
+          <p className="text-lg font-mono font-bold text-primary">{lastUpdated ? lastUpdated.toLocaleTimeString('tr-TR') : '-'}</p>
         </div>
       </div>
 
@@ -137,8 +159,7 @@ export default function LiveMonitoring({ token }) {
                     )}
                   </div>
                   {(() => {
-                    const logs = workLogs[item.task.id] || [];
-                    const { phase, duration, startTime } = calculateDuration(logs, item.task);
+                    const { phase, duration, startTime } = calculateDuration(item.timing, item.task);
                     const statusColors = {
                       'Ön Hazırlık': 'bg-blue-500/10 border-blue-500/30 text-blue-400',
                       'Üretim': 'bg-green-500/10 border-green-500/30 text-green-400',
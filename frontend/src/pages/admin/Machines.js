@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../../components/ui/button';
 import { Input } from '../../components/ui/input';
@@ -18,10 +19,7 @@ export default function Machines({ token }) {
 
   const fetchMachines = async () => {
     try {
-      const response = await axios.get(`${API_URL}/machines`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setMachines(response.data);
+      setMachines(await fetchAllPages('/machines', token));
     } catch (error) {
       toast.error('Makineler yüklenemedi');
     } finally {
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../../components/ui/button';
 import { Input } from '../../components/ui/input';
@@ -33,11 +34,7 @@ export default function Reports({ token }) {
 
   const fetchWorkers = async () => {
     try {
-      const response = await axios.get(`${API_URL}/users`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      const workersList = response.data.filter(u => u.role === 'worker');
-      setWorkers(workersList);
+      setWorkers(await fetchAllPages('/users', token, { role: 'worker' }));
     } catch (error) {
       console.error('Elemanlar yüklenemedi:', error);
     }
@@ -78,12 +75,24 @@ export default function Reports({ token }) {
     }
   };
 
-  const handleExportExcel = () => {
+  const handleExportExcel = async () => {
     if (!reportData) {
       toast.error('Önce rapor oluşturun');
       return;
     }
 
+    // Ham loglar sadece dışa aktarımda istenir
+    let logs = [];
+    try {
+      const response = await axios.get(`${API_URL}/reports/weekly?start_date=${selectedStartDate}&end_date=${selectedEndDate}&include_logs=true`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      logs = response.data.logs || [];
+    } catch (error) {
+      toast.error('Rapor detayları yüklenemedi');
+      return;
+    }
+
     const wb = XLSX.utils.book_new();
     
     const summaryData = [
@@ -111,8 +120,8 @@ export default function Reports({ token }) {
     const ws = XLSX.utils.aoa_to_sheet(summaryData);
     XLSX.utils.book_append_sheet(wb, ws, 'Özet');
 
-    if (reportData.logs && reportData.logs.length > 0) {
-      const logsData = reportData.logs.map(log => ({
+    if (logs.length > 0) {
+      const logsData = logs.map(log => ({
         'Tarih': new Date(log.timestamp).toLocaleString('tr-TR'),
         'Olay Tipi': log.event_type,
         'Duruş Sebebi': log.pause_reason || '-',
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../../components/ui/button';
 import { Input } from '../../components/ui/input';
@@ -20,10 +21,7 @@ export default function WorkOrders({ token, user }) {
 
   const fetchWorkOrders = async () => {
     try {
-      const response = await axios.get(`${API_URL}/work-orders`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setWorkOrders(response.data);
+      setWorkOrders(await fetchAllPages('/work-orders', token));
     } catch (error) {
       toast.error('İş emirleri yüklenemedi');
     } finally {
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
@@ -10,6 +11,7 @@ import { Badge } from '../../components/ui/badge';
 import { User, Trash2 } from 'lucide-react';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL + '/api';
+const ACTIVE_TASK_STATUSES = ['assigned', 'preparation', 'in_progress', 'paused'];
 
 export default function TaskManagement({ token, user }) {
   const [tasks, setTasks] = useState([]);
@@ -23,16 +25,17 @@ export default function TaskManagement({ token, user }) {
 
   const fetchData = async () => {
     try {
-      const [tasksRes, workersRes, machinesRes, ordersRes] = await Promise.all([
-        axios.get(`${API_URL}/tasks`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/users`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/machines`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/work-orders`, { headers: { Authorization: `Bearer ${token}` } })
+      const [activeTasks, workersList, machinesList, ordersList] = await Promise.all([
+        // Tamamlanan görev geçmişi yüklenmez; yalnızca açık durumlar sunucuda filtrelenir
+        Promise.all(ACTIVE_TASK_STATUSES.map(status => fetchAllPages('/tasks', token, { status }))),
+        fetchAllPages('/users', token, { role: 'worker' }),
+        fetchAllPages('/machines', token),
+        fetchAllPages('/work-orders', token)
       ]);
-      setTasks(tasksRes.data.filter(t => t.status !== 'completed' && t.status !== 'cancelled'));
-      setWorkers(workersRes.data.filter(u => u.role === 'worker'));
-      setMachines(machinesRes.data);
-      setWorkOrders(ordersRes.data);
+      setTasks(activeTasks.flat());
+      setWorkers(workersList);
+      setMachines(machinesList);
+      setWorkOrders(ordersList);
     } catch (error) {
       toast.error('Veriler yüklenemedi');
     } finally {
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../../lib/api';
 import { toast } from 'sonner';
 import { Button } from '../../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
@@ -24,14 +25,15 @@ export default function WorkOrdersList({ token, user }) {
 
   const fetchData = async () => {
     try {
-      const [ordersRes, machinesRes, tasksRes] = await Promise.all([
-        axios.get(`${API_URL}/work-orders`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/machines`, { headers: { Authorization: `Bearer ${token}` } }),
-        axios.get(`${API_URL}/tasks`, { headers: { Authorization: `Bearer ${token}` } })
+      const [pendingOrders, assignedOrders, machinesList, tasksList] = await Promise.all([
+        fetchAllPages('/work-orders', token, { status: 'pending' }),
+        fetchAllPages('/work-orders', token, { status: 'assigned' }),
+        fetchAllPages('/machines', token),
+        fetchAllPages('/tasks', token)
       ]);
-      setWorkOrders(ordersRes.data.filter(o => o.status === 'pending' || o.status === 'assigned'));
-      setMachines(machinesRes.data);
-      setTasks(tasksRes.data);
+      setWorkOrders([...pendingOrders, ...assignedOrders]);
+      setMachines(machinesList);
+      setTasks(tasksList);
     } catch (error) {
       toast.error('Veriler yüklenemedi');
     } finally {
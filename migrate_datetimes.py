@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Convert legacy ISO string timestamps to native BSON dates
+
+Eski kayıtlarda created_at / assigned_at / timestamp alanları ISO string
+olarak saklanıyordu. Bu komut belgeleri küçük partiler halinde dönüştürür;
+sunucu çalışırken güvenle çalıştırılabilir ve tekrar çalıştırılırsa sadece
+kalan string alanları işler.
+
+Kullanım:
+    python migrate_datetimes.py [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+# Load environment
+ROOT_DIR = Path(__file__).parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+db = client[os.environ['DB_NAME']]
+
+DATETIME_FIELDS = [
+    ("users", "created_at"),
+    ("machines", "created_at"),
+    ("work_orders", "created_at"),
+    ("tasks", "assigned_at"),
+    ("work_logs", "timestamp"),
+]
+
+
+def to_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+async def migrate_field(collection_name: str, field: str, batch_size: int, dry_run: bool) -> int:
+    collection = db[collection_name]
+    converted = 0
+    last_id = None
+    while True:
+        query = {field: {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await collection.find(query, {"_id": 1, field: 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = []
+        for doc in batch:
+            try:
+                value = to_utc(doc[field])
+            except ValueError:
+                print(f"  ⚠️ {collection_name}.{field} okunamadı: _id={doc['_id']} değer={doc[field]!r}")
+                continue
+            # Filtre eski değeri de içerir; arada güncellenen belgeye dokunulmaz
+            operations.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: value}}))
+
+        if operations and not dry_run:
+            result = await collection.bulk_write(operations, ordered=False)
+            converted += result.modified_count
+        else:
+            converted += len(operations)
+    return converted
+
+
+async def migrate(batch_size: int, dry_run: bool):
+    print("🔧 Migrating ISO string timestamps to BSON dates..." + (" (dry run)" if dry_run else ""))
+    for collection_name, field in DATETIME_FIELDS:
+        converted = await migrate_field(collection_name, field, batch_size, dry_run)
+        print(f"✅ {collection_name}.{field}: {converted} belge dönüştürüldü")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run))
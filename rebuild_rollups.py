@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_rollups collection from work_logs
+
+Raporlar work_logs yerine gün x makine x eleman bazındaki daily_rollups
+belgelerini okur. Yeni olaylar bu belgeleri $inc ile günceller; bu komut
+geçmiş olayları baştan oynatarak koleksiyonu yeniden oluşturur (ilk kurulum
+veya log düzeltmelerinden sonra). Sonuç ayrı bir koleksiyonda hazırlanıp
+tek adımda değiştirilir; komut çalışırken yazılan olaylar değişimin hemen
+öncesinde hazırlanan koleksiyona da işlenir. Son yakalama geçişi ile değişim
+arasında yazılan olaylar (veya 5 geçişin hepsinde yeni olay bulunursa kalanlar)
+yalnızca eski koleksiyona işlenir ve kaybolur; komutu üretimin sakin olduğu bir
+anda çalıştırın ya da sonra tekrar çalıştırın.
+
+Kullanım:
+    python rebuild_rollups.py [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+from server import client, rebuild_daily_rollups, ROLLUP_REBUILD_BATCH  # noqa: E402
+
+
+async def rebuild(batch_size: int):
+    print("🔧 Rebuilding daily rollups from work logs...")
+    result = await rebuild_daily_rollups(batch_size)
+    print(
+        f"✅ {result['events']} olay işlendi ({result['replayed']} olay çalışma sırasında geldi), "
+        f"{result['rollups']} rollup belgesi yazıldı, {result['tasks']} görev güncellendi"
+    )
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=ROLLUP_REBUILD_BATCH)
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.batch_size))
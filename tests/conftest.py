@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks._bootstrap import use_backend
+
+# API testleri mongomock kullanır; mongomock transaction desteklemez
+use_backend("fethmes_test", MONGO_TRANSACTIONS="off")
+
+import server  # noqa: E402
+
+# Rollup ve performans testlerinin ortak takvimi: 2026-01-05 ve ertesi gün
+DAY_1 = datetime(2026, 1, 5, tzinfo=timezone.utc)
+DAY_2 = DAY_1 + timedelta(days=1)
+
+
+def log(event_type, timestamp, task_id="t1", **fields):
+    """A bare work-log document for the pure rollup/engine helpers"""
+    return {
+        "task_id": task_id, "worker_id": "w1", "machine_id": "m1",
+        "event_type": event_type, "timestamp": timestamp, **fields,
+    }
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """One TestClient for the session: shutdown closes the password thread pool"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from fastapi.testclient import TestClient
+
+    server.client = mongomock_motor.AsyncMongoMockClient()
+    server.db = server.client["fethmes_test"]
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def api(app_client):
+    """Fresh database with the demo data; yields the client and role headers"""
+    server.db = server.client[f"fethmes_test_{uuid.uuid4().hex[:8]}"]
+    server.user_cache.clear()
+    server.report_cache.clear()
+    # Benzersiz indexler (ör. idempotency anahtarı) davranışın parçasıdır
+    app_client.portal.call(server.ensure_indexes)
+    assert app_client.post("/api/init-data").status_code == 200
+    app_client.portal.call(server.live_snapshot.rebuild)
+
+    def login(username, password):
+        response = app_client.post("/api/auth/login", json={"username": username, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['token']}"}, response.json()["user"]
+
+    admin, _ = login("admin", "admin123")
+    worker, worker_user = login("eleman1", "eleman123")
+    return {"client": app_client, "admin": admin, "worker": worker, "worker_user": worker_user}
+
+
+@pytest.fixture
+def make_task(api):
+    """Create a work order with one task per quantity, spread over the machines"""
+    client = api["client"]
+
+    def create(*quantities):
+        machines = client.get("/api/machines", headers=api["admin"]).json()
+        order = client.post("/api/work-orders", headers=api["admin"], json={
+            "order_no": f"WO-{uuid.uuid4().hex[:6]}", "part_name": "Flanş", "quantity": sum(quantities)
+        }).json()
+        tasks = [
+            client.post("/api/tasks", headers=api["admin"], json={
+                "work_order_id": order["id"],
+                "machine_id": machines[i % len(machines)]["id"],
+                "quantity_assigned": quantity,
+            }).json()
+            for i, quantity in enumerate(quantities)
+        ]
+        return order, tasks
+
+    return create
+
+
+@pytest.fixture
+def post_log(api):
+    """POST one work-log event as the worker; extra headers (e.g. Idempotency-Key) are merged in"""
+    def post(task_id, event_type, headers=None, **fields):
+        return api["client"].post(
+            "/api/work-logs",
+            headers={**api["worker"], **(headers or {})},
+            json={"task_id": task_id, "event_type": event_type, **fields},
+        )
+
+    return post
+
+
+@pytest.fixture
+def closed_day_logs(api, make_task):
+    """Two events on 2026-01-05 for one task"""
+    _, (task,) = make_task(10)
+    response = api["client"].post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": task["id"], "event_type": "work_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": task["id"], "event_type": "work_pause", "pause_reason": "break", "timestamp": "2026-01-05T09:00:00"},
+    ])
+    assert response.json()["accepted"] == 2
+    return task
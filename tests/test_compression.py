@@ -0,0 +1,25 @@
+import pytest
+
+from server import negotiate_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0.5, br;q=0.8", "br"),
+    ("identity", None),
+    ("", None),
+    ("*", "br"),
+    ("*;q=0", None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_large_responses_are_compressed(api, make_task):
+    make_task(*[10] * 20)
+    response = api["client"].get("/api/tasks", headers={**api["admin"], "Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert len(response.json()) == 20
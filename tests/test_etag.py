@@ -0,0 +1,21 @@
+def test_etag_answers_304_until_collection_changes(api):
+    client, admin = api["client"], api["admin"]
+    first = client.get("/api/machines", headers=admin)
+    etag = first.headers["ETag"]
+
+    cached = client.get("/api/machines", headers={**admin, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.post("/api/machines", headers=admin, json={"name": "Freze 1", "code": "F001"})
+    changed = client.get("/api/machines", headers={**admin, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert "F001" in [machine["code"] for machine in changed.json()]
+
+
+def test_etag_differs_per_query(api):
+    client, admin = api["client"], api["admin"]
+    all_tasks = client.get("/api/tasks", headers=admin).headers["ETag"]
+    assigned = client.get("/api/tasks", headers=admin, params={"status": "assigned"}).headers["ETag"]
+    assert all_tasks != assigned
@@ -0,0 +1,7 @@
+def test_stream_token_is_scoped_to_event_stream(api):
+    client = api["client"]
+    session_token = api["admin"]["Authorization"].split()[1]
+    stream_token = client.post("/api/events/stream-token", headers=api["admin"]).json()["token"]
+
+    assert client.get("/api/events/stream", params={"token": session_token}).status_code == 401
+    assert client.get("/api/machines", headers={"Authorization": f"Bearer {stream_token}"}).status_code == 401
@@ -0,0 +1,61 @@
+import csv
+import gzip
+import io
+import json
+
+import server
+
+
+def export(api, **params):
+    response = api["client"].get("/api/exports/work-logs", headers=api["admin"], params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_csv_has_header_and_one_row_per_log(api, closed_day_logs, monkeypatch):
+    # Her parti ayrı parça olarak yazılır; parti sınırında satır kaybolmamalı
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 1)
+    response = export(api)
+    assert response.headers["content-type"].startswith("text/csv")
+
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames == server.EXPORT_COLUMNS
+    rows = list(reader)
+    assert [row["event_type"] for row in rows] == ["work_start", "work_pause"]
+    assert rows[0]["timestamp"] == "2026-01-05T08:00:00+00:00"
+    assert rows[1]["pause_reason"] == "break"
+    assert rows[0]["worker_username"] == "eleman1"
+    assert rows[0]["machine_code"]
+
+
+def test_ndjson_rows_use_export_columns(api, closed_day_logs):
+    response = export(api, format="ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+    assert all(list(row) == server.EXPORT_COLUMNS for row in rows)
+    assert rows[0]["task_id"] == closed_day_logs["id"]
+
+
+def test_gzip_export_decompresses_to_plain_export(api, closed_day_logs):
+    response = export(api, format="ndjson", gzip=True)
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="work_logs.ndjson.gz"' in response.headers["content-disposition"]
+    assert gzip.decompress(response.content).decode() == export(api, format="ndjson").text
+
+
+def test_filters_narrow_the_export(api, closed_day_logs):
+    def count(**params):
+        return len(export(api, format="ndjson", **params).text.splitlines())
+
+    assert count(start_date="2026-01-05", end_date="2026-01-05") == 2
+    assert count(start_date="2026-01-06") == 0
+    assert count(worker_id=api["worker_user"]["id"]) == 2
+    assert count(worker_id="başka") == 0
+    assert count(machine_id=closed_day_logs["machine_id"]) == 2
+    assert count(machine_id="başka") == 0
+
+
+def test_export_is_admin_only(api):
+    response = api["client"].get("/api/exports/work-logs", headers=api["worker"])
+    assert response.status_code == 403
@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from server import FastJSONResponse, FastJSONRoute
+
+
+class Item(BaseModel):
+    name: str
+
+
+def build_client():
+    router = APIRouter(route_class=FastJSONRoute, default_response_class=FastJSONResponse)
+
+    @router.post("/plain/created", status_code=201)
+    async def plain_created():
+        return {"at": datetime(2026, 1, 5, 8, tzinfo=timezone.utc)}
+
+    @router.get("/plain/accepted")
+    async def plain_accepted(response: Response):
+        response.status_code = 202
+        return {"ok": True}
+
+    @router.get("/plain/headers")
+    def plain_headers(response: Response):
+        response.headers["ETag"] = '"v1"'
+        response.headers["Cache-Control"] = "no-cache"
+        return [1, 2]
+
+    @router.get("/plain/error")
+    async def plain_error():
+        raise HTTPException(status_code=404, detail="Bulunamadı")
+
+    @router.post("/model/created", response_model=Item, status_code=201)
+    async def model_created(response: Response):
+        response.headers["ETag"] = '"v2"'
+        return {"name": "Flanş", "secret": "gizli"}
+
+    @router.get("/model/accepted", response_model=Item)
+    async def model_accepted(response: Response):
+        response.status_code = 202
+        return {"name": "Mil"}
+
+    @router.get("/model/error", response_model=Item)
+    async def model_error():
+        raise HTTPException(status_code=409, detail="Çakışma", headers={"Retry-After": "1"})
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return build_client()
+
+
+def test_declared_status_code_is_kept(client):
+    plain = client.post("/plain/created")
+    assert plain.status_code == 201
+    assert plain.json() == {"at": "2026-01-05T08:00:00+00:00"}
+    assert client.post("/model/created").status_code == 201
+
+
+def test_status_code_set_on_response_is_kept(client):
+    assert client.get("/plain/accepted").status_code == 202
+    assert client.get("/model/accepted").status_code == 202
+
+
+def test_headers_set_on_response_survive(client):
+    plain = client.get("/plain/headers")
+    assert (plain.headers["ETag"], plain.headers["Cache-Control"]) == ('"v1"', "no-cache")
+    assert plain.json() == [1, 2]
+
+    model = client.post("/model/created")
+    assert model.headers["ETag"] == '"v2"'
+    # response_model filtrelemesi korunur
+    assert model.json() == {"name": "Flanş"}
+
+
+def test_http_exception_bodies_are_unchanged(client):
+    plain = client.get("/plain/error")
+    assert (plain.status_code, plain.json()) == (404, {"detail": "Bulunamadı"})
+
+    model = client.get("/model/error")
+    assert (model.status_code, model.json()) == (409, {"detail": "Çakışma"})
+    assert model.headers["Retry-After"] == "1"
@@ -0,0 +1,99 @@
+import asyncio
+from collections import defaultdict
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import server
+
+
+class FakeCollection:
+    def __init__(self):
+        self.indexes = {}
+        self.create_error = None
+
+    async def index_information(self):
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    async def create_index(self, keys, **options):
+        if self.create_error is not None:
+            raise self.create_error
+        self.indexes[options["name"]] = {"key": keys, **{k: v for k, v in options.items() if k != "name"}}
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = defaultdict(FakeCollection)
+        self.commands = []
+        self.command_error = None
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+    async def command(self, *args, **kwargs):
+        if self.command_error is not None:
+            raise self.command_error
+        self.commands.append((args, kwargs))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def ensure():
+    return asyncio.run(server.ensure_indexes())
+
+
+def test_missing_indexes_are_created_once(fake_db):
+    created = ensure()
+    assert len(created) == len(server.INDEXES)
+    assert ensure() == []
+
+
+def test_index_with_other_options_is_reported_not_replaced(fake_db, caplog):
+    # Eski kurulumlardaki unique olmayan id_1
+    fake_db["users"].indexes["id_1"] = {"key": [("id", 1)]}
+    created = ensure()
+    assert "users.id_unique" not in created
+    assert "id_unique" not in fake_db["users"].indexes
+    assert "'id_1' index'i farklı seçeneklerle mevcut" in caplog.text
+
+
+def test_changed_ttl_is_applied_with_collmod(fake_db):
+    fake_db["idempotency_keys"].indexes["created_at_ttl"] = {"key": [("created_at", 1)], "expireAfterSeconds": 60}
+    created = ensure()
+    assert "idempotency_keys.created_at_ttl" not in created
+    assert fake_db.commands == [(
+        ("collMod", "idempotency_keys"),
+        {"index": {"name": "created_at_ttl", "expireAfterSeconds": server.IDEMPOTENCY_TTL_SECONDS}},
+    )]
+
+
+def test_failed_collmod_is_logged(fake_db, caplog):
+    fake_db["idempotency_keys"].indexes["created_at_ttl"] = {"key": [("created_at", 1)], "expireAfterSeconds": 60}
+    fake_db.command_error = OperationFailure("collMod yetkisi yok", code=13)
+    ensure()
+    assert "Index TTL güncellenemedi idempotency_keys.created_at_ttl" in caplog.text
+
+
+def test_conflict_from_concurrent_worker_is_not_an_error(fake_db, caplog):
+    collection = fake_db["machines"]
+
+    async def create_then_conflict(keys, **options):
+        # Başka bir worker aynı index'i az önce oluşturdu
+        collection.indexes[options["name"]] = {"key": keys, **{k: v for k, v in options.items() if k != "name"}}
+        raise OperationFailure("Index already exists", code=85)
+    collection.create_index = create_then_conflict
+
+    created = ensure()
+    assert not any(name.startswith("machines.") for name in created)
+    assert "Index oluşturulamadı" not in caplog.text
+
+
+def test_unresolved_conflict_is_logged(fake_db, caplog):
+    fake_db["machines"].create_error = OperationFailure("IndexOptionsConflict", code=85)
+    ensure()
+    assert "Index oluşturulamadı machines.id_unique" in caplog.text
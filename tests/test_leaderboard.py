@@ -0,0 +1,7 @@
+def test_leaderboard_reflects_renamed_worker(api, closed_day_logs):
+    client = api["client"]
+    params = {"start_date": "2026-01-05", "end_date": "2026-01-05"}
+    client.get("/api/reports/worker-leaderboard", headers=api["admin"], params=params)
+    client.put(f"/api/users/{api['worker_user']['id']}", headers=api["admin"], json={"full_name": "Yeni Ad"})
+    workers = client.get("/api/reports/worker-leaderboard", headers=api["admin"], params=params).json()["workers"]
+    assert "Yeni Ad" in [row["worker"]["full_name"] for row in workers]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def test_watcher_retries_initial_load(monkeypatch):
+    calls = []
+
+    async def rebuild():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("mongo henüz hazır değil")
+        # İkinci deneme yapıldı; sonsuz döngüden çıkmak için görev durdurulur
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(server.live_snapshot, "rebuild", rebuild)
+    monkeypatch.setattr(server, "LIVE_SNAPSHOT_POLL_SECONDS", 0)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(server.watch_live_snapshot())
+    assert len(calls) == 2
+
+
+def settle(portal):
+    async def wait():
+        while server.live_snapshot._background:
+            await asyncio.gather(*list(server.live_snapshot._background))
+    portal.call(wait)
+
+
+def live_entry(api, machine_id):
+    entries = api["client"].get("/api/dashboard/live-status", headers=api["admin"]).json()
+    return next(entry for entry in entries if entry["machine"]["id"] == machine_id)
+
+
+def test_writes_update_snapshot_and_notify_subscribers(api, make_task, post_log):
+    client, portal = api["client"], api["client"].portal
+    _, (task,) = make_task(10)
+    settle(portal)
+    queue = server.event_broker.subscribe()
+    try:
+        assert post_log(task["id"], "prep_start").status_code == 200
+        settle(portal)
+        event = queue.get_nowait()
+        assert (event["type"], event["task"]["id"], event["machine"]["status"]) == ("work_log", task["id"], "running")
+        entry = live_entry(api, task["machine_id"])
+        assert (entry["machine"]["current_task_id"], entry["task"]["status"]) == (task["id"], "preparation")
+
+        assert client.delete(f"/api/tasks/{task['id']}", headers=api["admin"]).status_code == 200
+        settle(portal)
+        event = queue.get_nowait()
+        assert (event["type"], event["task"]["id"]) == ("task_deleted", task["id"])
+        entry = live_entry(api, task["machine_id"])
+        assert (entry["machine"]["status"], entry["machine"]["current_task_id"], entry["task"]) == ("idle", None, None)
+        assert queue.empty()
+    finally:
+        server.event_broker.unsubscribe(queue)
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+from server import summarise_task_logs
+
+START = datetime(2026, 1, 5, 8, tzinfo=timezone.utc)
+
+
+def log(event_type, minutes, **fields):
+    return {"event_type": event_type, "timestamp": START + timedelta(minutes=minutes), **fields}
+
+
+def test_closed_pauses_accumulate():
+    summary = summarise_task_logs([
+        log("prep_start", 0),
+        log("prep_end", 10),
+        log("work_pause", 20, pause_reason="break"),
+        log("work_resume", 35),
+        log("work_pause", 50, pause_reason="failure"),
+        log("work_complete", 55, quantity_completed=5),
+    ])
+    assert summary["started_at"] == START
+    assert summary["pause_seconds"] == 20 * 60
+    assert summary["paused_since"] is None
+    assert summary["pause_reason"] is None
+    assert summary["last_event_type"] == "work_complete"
+
+
+def test_open_pause_reports_since_and_reason():
+    summary = summarise_task_logs([
+        log("work_start", 0),
+        log("work_pause", 5, pause_reason="meal"),
+        log("work_resume", 10),
+        log("work_pause", 30, pause_reason="material_shortage"),
+    ])
+    # Açık mola toplam süreye henüz eklenmez
+    assert summary["pause_seconds"] == 5 * 60
+    assert summary["paused_since"] == START + timedelta(minutes=30)
+    assert summary["phase_started_at"] == START + timedelta(minutes=30)
+    assert summary["pause_reason"] == "material_shortage"
+
+
+def test_legacy_string_timestamps_and_no_logs():
+    summary = summarise_task_logs([{"event_type": "work_start", "timestamp": "2026-01-05T08:00:00"}])
+    assert summary["started_at"] == START
+    assert summarise_task_logs([]) == {
+        "started_at": None, "phase_started_at": None, "last_event_type": None,
+        "paused_since": None, "pause_reason": None, "pause_seconds": 0.0,
+    }
+
+
+class CountingDatabase:
+    """Counts find/find_one/aggregate calls made through db.<collection>"""
+
+    def __init__(self, db):
+        self.db = db
+        self.queries = 0
+
+    def __getattr__(self, name):
+        return CountingCollection(self, getattr(self.db, name))
+
+
+class CountingCollection:
+    def __init__(self, database, collection):
+        self.database = database
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+        if name not in ("find", "find_one", "aggregate"):
+            return method
+
+        def counted(*args, **kwargs):
+            self.database.queries += 1
+            return method(*args, **kwargs)
+        return counted
+
+
+def live_status_queries(api, monkeypatch):
+    """Number of queries one build_live_status call makes, and how many machines are busy"""
+    async def settle():
+        while server.live_snapshot._background:
+            await asyncio.gather(*list(server.live_snapshot._background))
+
+    portal = api["client"].portal
+    portal.call(settle)
+    counting = CountingDatabase(server.db)
+    monkeypatch.setattr(server, "db", counting)
+    try:
+        entries = portal.call(server.build_live_status, {})
+    finally:
+        monkeypatch.setattr(server, "db", counting.db)
+    return counting.queries, sum(1 for entry in entries if entry["task"])
+
+
+def test_live_status_query_count_does_not_grow_with_machines(api, make_task, monkeypatch):
+    client = api["client"]
+
+    def start_tasks():
+        machine_count = len(client.get("/api/machines", headers=api["admin"]).json())
+        _, tasks = make_task(*[5] * machine_count)
+        for task in tasks:
+            response = client.post("/api/work-logs", headers=api["worker"], json={
+                "task_id": task["id"], "event_type": "prep_start"
+            })
+            assert response.status_code == 200, response.text
+
+    start_tasks()
+    few_queries, few_busy = live_status_queries(api, monkeypatch)
+    for i in range(8):
+        response = client.post("/api/machines", headers=api["admin"], json={"name": f"Tezgah {i}", "code": f"TZ-{i}"})
+        assert response.status_code == 200, response.text
+    start_tasks()
+    many_queries, many_busy = live_status_queries(api, monkeypatch)
+
+    assert many_busy > few_busy
+    assert many_queries == few_queries == 5
@@ -0,0 +1,72 @@
+import numpy as np
+
+from server import machine_state_chunk, machine_state_seconds, merge_machine_chunks
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def test_merged_chunks_match_single_pass():
+    rng = np.random.default_rng(3)
+    machines, count, start, end = 5, 3000, 0, 6 * DAY_MS + 12345
+    machine_index = rng.integers(0, machines, count)
+    times = rng.integers(start, end, count)
+    states = rng.integers(0, 4, count)
+    reasons = rng.integers(0, 7, count)
+    seed_machines, seed_states, seed_reasons = np.array([0, 3]), np.array([3, 2]), np.array([1, 0])
+
+    # Tek geçiş: aralık öncesi durum aralık başında bir olay gibi eklenir
+    expected_states, expected_reasons = machine_state_seconds(
+        np.r_[seed_machines, machine_index], np.r_[np.full(2, start), times],
+        np.r_[seed_states, states], np.r_[seed_reasons, reasons], start, end, machines
+    )
+
+    partials = []
+    for chunk_start in range(start, end, DAY_MS):
+        chunk_end = min(chunk_start + DAY_MS, end)
+        selected = (times >= chunk_start) & (times < chunk_end)
+        partials.append(machine_state_chunk(
+            machine_index[selected], times[selected], states[selected], reasons[selected], chunk_start, chunk_end, machines
+        ))
+    seed_state = np.zeros(machines, dtype=np.int64)
+    seed_reason = np.full(machines, 6, dtype=np.int64)
+    seed_state[seed_machines], seed_reason[seed_machines] = seed_states, seed_reasons
+    state_seconds, reason_seconds = merge_machine_chunks(partials, seed_state, seed_reason)
+
+    # Boşta sütunu rapor tarafında kalan süreden hesaplanır; diğer durumlar birebir aynı olmalı
+    assert np.allclose(state_seconds[:, 1:], expected_states[:, 1:])
+    assert np.allclose(reason_seconds, expected_reasons)
+    assert np.allclose(state_seconds.sum(axis=1), (end - start) / 1000)
+
+
+def test_chunk_without_events_carries_previous_state():
+    empty = np.array([], dtype=np.int64)
+    partial = machine_state_chunk(empty, empty, empty, empty, 0, DAY_MS, 2)
+    assert list(partial["last_state"]) == [-1, -1]
+    state_seconds, reason_seconds = merge_machine_chunks([partial], np.array([2, 3]), np.array([6, 1]))
+    assert state_seconds[0, 2] == DAY_MS / 1000
+    assert state_seconds[1, 3] == reason_seconds[1, 1] == DAY_MS / 1000
+
+
+def test_utilization_seeds_state_from_event_before_range(api, closed_day_logs):
+    params = {"start_date": "2026-01-06", "end_date": "2026-01-06", "machine_id": closed_day_logs["machine_id"]}
+    report = api["client"].get("/api/reports/machine-utilization", headers=api["admin"], params=params).json()
+    # 5 Ocak'taki mola 6 Ocak boyunca sürer
+    (machine,) = report["machines"]
+    assert machine["paused_minutes"] == 24 * 60
+    assert machine["pause_breakdown"]["break_minutes"] == 24 * 60
+
+
+def test_backfilled_log_before_range_refreshes_cached_report(api, closed_day_logs, make_task):
+    client = api["client"]
+    params = {"start_date": "2026-01-06", "end_date": "2026-01-06", "machine_id": closed_day_logs["machine_id"]}
+    first = client.get("/api/reports/machine-utilization", headers=api["admin"], params=params).json()
+    assert first["machines"][0]["paused_minutes"] == 24 * 60
+
+    # Aynı makinede başka bir görevin geç gelen olayı, aralıktan önceki son durumu değiştirir
+    _, (other,) = make_task(10)
+    assert other["machine_id"] == closed_day_logs["machine_id"]
+    client.post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": other["id"], "event_type": "work_start", "timestamp": "2026-01-05T23:00:00"},
+    ])
+    updated = client.get("/api/reports/machine-utilization", headers=api["admin"], params=params).json()
+    assert updated["machines"][0]["running_minutes"] == 24 * 60
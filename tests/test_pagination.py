@@ -0,0 +1,46 @@
+import server
+
+
+def test_pages_follow_cursor_without_overlap(api, make_task):
+    make_task(*[5] * 7)
+    client, seen, after = api["client"], [], None
+    while True:
+        params = {"limit": 3, **({"after": after} if after else {})}
+        page = client.get("/api/tasks", headers=api["admin"], params=params).json()
+        seen += [task["id"] for task in page["items"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_plain_list_over_limit_is_rejected(api, make_task, monkeypatch):
+    make_task(*[5] * 4)
+    monkeypatch.setattr(server, "LIST_RESPONSE_LIMIT", 3)
+    client = api["client"]
+    assert client.get("/api/tasks", headers=api["admin"]).status_code == 400
+    assert len(client.get("/api/tasks", headers=api["admin"], params={"limit": 3}).json()["items"]) == 3
+
+    monkeypatch.setattr(server, "LIST_RESPONSE_LIMIT", 4)
+    assert len(client.get("/api/tasks", headers=api["admin"]).json()) == 4
+
+
+def test_invalid_cursor_is_rejected(api):
+    response = api["client"].get("/api/tasks", headers=api["admin"], params={"after": "bozuk"})
+    assert response.status_code == 400
+
+
+def test_worker_tasks_are_paginated(api, make_task, monkeypatch):
+    _, tasks = make_task(*[5] * 4)
+    worker_id = api["worker_user"]["id"]
+    task_ids = [task["id"] for task in tasks]
+    assign = {"$set": {"assigned_worker_id": worker_id}}
+    api["client"].portal.call(server.db.tasks.update_many, {"id": {"$in": task_ids}}, assign)
+    monkeypatch.setattr(server, "LIST_RESPONSE_LIMIT", 3)
+    client, url = api["client"], f"/api/tasks/worker/{worker_id}"
+    assert client.get(url, headers=api["worker"]).status_code == 400
+
+    first = client.get(url, headers=api["worker"], params={"limit": 3}).json()
+    rest = client.get(url, headers=api["worker"], params={"limit": 3, "after": first["next_cursor"]}).json()
+    assert sorted(task["id"] for task in first["items"] + rest["items"]) == sorted(task_ids)
+    assert rest["next_cursor"] is None
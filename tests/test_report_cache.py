@@ -0,0 +1,38 @@
+import server
+
+
+def test_closed_day_report_is_cached_until_that_day_changes(api, closed_day_logs):
+    client, params = api["client"], {"date": "2026-01-05"}
+    first = client.get("/api/reports/daily", headers=api["admin"], params=params).json()
+    hits = server.report_cache.hits
+    assert client.get("/api/reports/daily", headers=api["admin"], params=params).json() == first
+    assert server.report_cache.hits == hits + 1
+
+    client.post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": closed_day_logs["id"], "event_type": "work_resume", "timestamp": "2026-01-05T09:30:00"},
+    ])
+    updated = client.get("/api/reports/daily", headers=api["admin"], params=params).json()
+    assert updated["total_logs"] == first["total_logs"] + 1
+    assert updated["pause_time_minutes"] == {"break": 30.0}
+
+
+def test_write_to_other_day_keeps_cached_report(api, closed_day_logs, make_task):
+    client, params = api["client"], {"date": "2026-01-05"}
+    client.get("/api/reports/daily", headers=api["admin"], params=params)
+    _, (other,) = make_task(5)
+    client.post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": other["id"], "event_type": "work_start", "timestamp": "2026-01-07T08:00:00"},
+    ])
+    hits = server.report_cache.hits
+    client.get("/api/reports/daily", headers=api["admin"], params=params)
+    assert server.report_cache.hits == hits + 1
+
+
+def test_report_logs_are_not_cached(api, closed_day_logs):
+    client = api["client"]
+    params = {"date": "2026-01-05", "include_logs": True}
+    assert len(client.get("/api/reports/daily", headers=api["admin"], params=params).json()["logs"]) == 2
+    # Loglu ve logsuz istek aynı önbellek kaydını kullanır; kayıtta log yoktur
+    hits = server.report_cache.hits
+    assert "logs" not in client.get("/api/reports/daily", headers=api["admin"], params={"date": "2026-01-05"}).json()
+    assert server.report_cache.hits == hits + 1
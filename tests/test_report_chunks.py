@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+import server
+from server import report_chunks
+
+
+def utc(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def test_report_chunks_cover_range_on_day_boundaries():
+    chunks = report_chunks(utc("2026-01-01T05:00"), utc("2026-01-04T12:00"))
+    assert chunks == [
+        (utc("2026-01-01T05:00"), utc("2026-01-02")),
+        (utc("2026-01-02"), utc("2026-01-03")),
+        (utc("2026-01-03"), utc("2026-01-04")),
+        (utc("2026-01-04"), utc("2026-01-04T12:00")),
+    ]
+
+
+def test_report_chunks_align_weeks_independently_of_start(monkeypatch):
+    monkeypatch.setattr(server, "REPORT_CHUNK_DAYS", 7)
+    first = report_chunks(utc("2026-01-01"), utc("2026-01-31"))
+    second = report_chunks(utc("2026-01-10"), utc("2026-01-31"))
+    # Örtüşen aralıklar aynı tam hafta parçalarını paylaşır
+    assert first[2:] == second[1:]
+    assert all((end - start) == timedelta(days=7) for start, end in first[1:-1])
+
+
+def test_chunked_report_reads_day_versions_once(api, closed_day_logs, monkeypatch):
+    reads = []
+    load_report_days = server.load_report_days
+
+    async def counting_load():
+        reads.append(1)
+        return await load_report_days()
+    monkeypatch.setattr(server, "load_report_days", counting_load)
+
+    params = {"start_date": "2026-01-01", "end_date": "2026-01-31"}
+    response = api["client"].get("/api/reports/machine-utilization", headers=api["admin"], params=params)
+    assert response.status_code == 200
+    # Bir okuma tüm rapor için, bir okuma tüm gün parçaları için
+    assert len(reads) == 2
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from server import rollup_increments, split_by_day
+from tests.conftest import DAY_1, DAY_2, log
+
+
+def test_split_by_day_cuts_at_midnight():
+    pieces = list(split_by_day(DAY_1 + timedelta(hours=23), DAY_2 + timedelta(hours=1, minutes=30)))
+    assert pieces == [(DAY_1, 60.0), (DAY_2, 90.0)]
+
+
+def test_rollup_increments_split_interval_across_midnight():
+    task = {"status": "in_progress", "last_event_at": DAY_1 + timedelta(hours=23, minutes=30)}
+    doc = log("work_pause", DAY_2 + timedelta(minutes=45), pause_reason="meal")
+
+    increments = rollup_increments(task, doc)
+
+    assert increments[DAY_1] == {"work_minutes": 30.0}
+    assert increments[DAY_2] == {
+        "event_counts.work_pause": 1,
+        "pause_counts.meal": 1,
+        "work_minutes": 45.0,
+    }
+
+
+def test_rollup_increments_pause_time_uses_reason():
+    task = {"status": "paused", "last_event_at": DAY_1 + timedelta(hours=10), "pause_reason": "failure"}
+    increments = rollup_increments(task, log("work_complete", DAY_1 + timedelta(hours=10, minutes=20), quantity_completed=7))
+    assert increments[DAY_1]["pause_minutes.failure"] == 20.0
+    assert increments[DAY_1]["production"] == 7
+
+
+def test_rebuild_reproduces_incremental_rollups(api, make_task):
+    import server
+
+    _, (task,) = make_task(10)
+    api["client"].post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": task["id"], "event_type": "work_start", "timestamp": "2026-01-05T22:00:00"},
+        {"task_id": task["id"], "event_type": "work_pause", "pause_reason": "break", "timestamp": "2026-01-06T01:00:00"},
+        {"task_id": task["id"], "event_type": "work_resume", "timestamp": "2026-01-06T01:30:00"},
+    ])
+    live = api["client"].portal.call(server.load_rollups, {})
+    result = api["client"].portal.call(server.rebuild_daily_rollups)
+
+    assert result["events"] == 3
+    assert api["client"].portal.call(server.load_rollups, {}) == live
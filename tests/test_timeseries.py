@@ -0,0 +1,39 @@
+import server
+from server import fill_timeseries
+
+HOUR_MS = 3600 * 1000
+START_MS = 1_767_571_200_000  # 2026-01-05T00:00Z
+
+
+def test_groups_land_in_their_bucket_and_empty_buckets_are_zero():
+    partials = [
+        [("m1", START_MS, 5, 2), ("m2", START_MS + 2 * HOUR_MS, 3, 1)],
+        # Aynı dilime düşen ikinci parça toplanır
+        [("m1", START_MS, 1, 1)],
+    ]
+    timestamps, series = fill_timeseries(partials, START_MS, HOUR_MS, 4)
+    assert timestamps == [START_MS + i * HOUR_MS for i in range(4)]
+    assert series == [
+        {"key": "m1", "production": [6, 0, 0, 0], "events": [3, 0, 0, 0]},
+        {"key": "m2", "production": [0, 0, 3, 0], "events": [0, 0, 1, 0]},
+    ]
+
+
+def test_groups_outside_the_range_are_dropped():
+    partials = [[("m1", START_MS - HOUR_MS, 9, 1), ("m1", START_MS + 3 * HOUR_MS, 9, 1), ("m1", START_MS + HOUR_MS, 2, 1)]]
+    _, series = fill_timeseries(partials, START_MS, HOUR_MS, 3)
+    assert series == [{"key": "m1", "production": [0, 2, 0], "events": [0, 1, 0]}]
+
+
+def test_bucket_inside_step_uses_floor_index():
+    # 15 dakikalık dilimlerde 00:14:59 ilk dilime düşer
+    step = 15 * 60 * 1000
+    _, series = fill_timeseries([[("m1", START_MS + step - 1000, 1, 1)]], START_MS, step, 2)
+    assert series[0]["events"] == [1, 0]
+
+
+def test_too_many_buckets_is_rejected(api):
+    params = {"start_date": "2025-01-01", "end_date": "2025-03-31", "bucket": "15m"}
+    response = api["client"].get("/api/reports/production-timeseries", headers=api["admin"], params=params)
+    assert response.status_code == 400
+    assert 90 * 24 * 4 > server.MAX_TIMESERIES_BUCKETS
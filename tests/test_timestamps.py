@@ -0,0 +1,16 @@
+from datetime import datetime, timedelta, timezone
+
+from server import date_range_filter, parse_timestamp
+
+
+def test_parse_timestamp_converts_offsets_to_utc():
+    assert parse_timestamp("2026-10-10T01:00:00+03:00") == datetime(2026, 10, 9, 22, tzinfo=timezone.utc)
+    assert parse_timestamp("2026-10-10T01:00:00+03:00").utcoffset() == timedelta(0)
+    assert parse_timestamp("2026-10-10T01:00:00") == datetime(2026, 10, 10, 1, tzinfo=timezone.utc)
+
+
+def test_date_range_filter_covers_whole_days():
+    bounds = date_range_filter("timestamp", "2026-01-05", "2026-01-06")["timestamp"]
+    assert bounds["$gte"] == datetime(2026, 1, 5, tzinfo=timezone.utc)
+    assert bounds["$lte"] == datetime(2026, 1, 6, 23, 59, 59, 999999, tzinfo=timezone.utc)
+    assert date_range_filter("timestamp", None, None) == {}
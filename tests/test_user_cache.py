@@ -0,0 +1,50 @@
+import server
+
+
+def test_user_deleted_by_another_process_is_evicted(api):
+    client, portal, worker = api["client"], api["client"].portal, api["worker"]
+    assert client.get("/api/machines", headers=worker).status_code == 200
+    version = portal.call(server.poll_user_changes, None)
+
+    # Başka bir worker süreci kullanıcıyı siler: bu sürecin önbelleği hâlâ geçerli kaydı tutar
+    async def delete_elsewhere():
+        await server.db.users.delete_one({"id": api["worker_user"]["id"]})
+        await server.bump_versions("users")
+    portal.call(delete_elsewhere)
+    assert client.get("/api/machines", headers=worker).status_code == 200
+
+    portal.call(server.poll_user_changes, version)
+    assert client.get("/api/machines", headers=worker).status_code == 401
+
+
+def test_cache_stats_count_hits_and_misses(api):
+    client, admin, worker = api["client"], api["admin"], api["worker"]
+    server.user_cache.clear()
+    before = client.get("/api/system/cache-stats", headers=admin).json()["user_cache"]
+
+    # İlk istek Mongo'dan okur, ikincisi önbellekten
+    client.get("/api/machines", headers=worker)
+    client.get("/api/machines", headers=worker)
+    after = client.get("/api/system/cache-stats", headers=admin).json()["user_cache"]
+
+    # Eleman: bir ıska + bir isabet; ikinci istatistik isteğindeki yönetici: bir isabet
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+    assert after["size"] == 2
+
+
+def test_update_user_evicts_cached_user(api):
+    client, portal = api["client"], api["client"].portal
+    user_id = api["worker_user"]["id"]
+    assert client.get("/api/machines", headers=api["worker"]).status_code == 200
+
+    assert client.put(f"/api/users/{user_id}", headers=api["admin"], json={"full_name": "Yeni Ad"}).status_code == 200
+    assert portal.call(server.load_user, user_id)["full_name"] == "Yeni Ad"
+
+
+def test_deleted_user_is_rejected_before_ttl_ends(api):
+    client, worker = api["client"], api["worker"]
+    assert client.get("/api/machines", headers=worker).status_code == 200
+
+    assert client.delete(f"/api/users/{api['worker_user']['id']}", headers=api["admin"]).status_code == 200
+    assert client.get("/api/machines", headers=worker).status_code == 401
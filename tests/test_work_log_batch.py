@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+import server
+
+
+def test_batch_rejects_out_of_order_events(api, make_task):
+    _, (task,) = make_task(10)
+    response = api["client"].post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": task["id"], "event_type": "prep_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": task["id"], "event_type": "work_resume", "timestamp": "2026-01-05T08:10:00"},
+        {"task_id": "missing", "event_type": "prep_start", "timestamp": "2026-01-05T08:20:00"},
+    ]).json()
+    assert (response["accepted"], response["rejected"]) == (1, 2)
+    assert [result["status"] for result in response["results"]] == ["created", "rejected", "rejected"]
+
+
+def post_batch(api, events):
+    return api["client"].post("/api/work-logs/batch", headers=api["worker"], json=events).json()
+
+
+def test_batch_keeps_client_timestamps_and_rolls_them_up(api, make_task):
+    _, (task,) = make_task(10)
+    response = post_batch(api, [
+        {"task_id": task["id"], "event_type": "work_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": task["id"], "event_type": "work_pause", "pause_reason": "break", "timestamp": "2026-01-05T09:30:00"},
+    ])
+    assert response["accepted"] == 2
+
+    logs = api["client"].get(f"/api/work-logs/task/{task['id']}", headers=api["worker"]).json()
+    assert [server.parse_timestamp(log["timestamp"]) for log in logs] == [
+        datetime(2026, 1, 5, 8, tzinfo=timezone.utc), datetime(2026, 1, 5, 9, 30, tzinfo=timezone.utc)
+    ]
+    (rollup,) = api["client"].portal.call(server.load_rollups, {"worker_id": api["worker_user"]["id"]})
+    assert server.parse_timestamp(rollup["day"]) == datetime(2026, 1, 5, tzinfo=timezone.utc)
+    assert rollup["work_minutes"] == 90
+    assert rollup["event_counts"] == {"work_start": 1, "work_pause": 1}
+
+
+def test_events_of_one_task_merge_into_one_task_and_machine_update(api, make_task, monkeypatch):
+    _, (task,) = make_task(10)
+    applied = []
+    apply_work_log_plans = server.apply_work_log_plans
+
+    async def recording_apply(task_plans, session=None):
+        applied.append(task_plans)
+        return await apply_work_log_plans(task_plans, session)
+    monkeypatch.setattr(server, "apply_work_log_plans", recording_apply)
+
+    response = post_batch(api, [
+        {"task_id": task["id"], "event_type": "prep_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": task["id"], "event_type": "prep_end", "timestamp": "2026-01-05T08:20:00"},
+        {"task_id": task["id"], "event_type": "work_pause", "pause_reason": "meal", "timestamp": "2026-01-05T11:00:00"},
+    ])
+    assert response["accepted"] == 3
+    ((task_id, plan),) = applied[0].items()
+    assert task_id == task["id"]
+    assert len(plan["work_logs"]) == 3
+    assert plan["task_set"]["status"] == "paused"
+    # prep_start alanları sonraki olaylarla silinmez
+    assert plan["machine_set"] == {
+        "status": "pause", "current_task_id": task["id"],
+        "current_worker_id": api["worker_user"]["id"], "current_work_order_id": task["work_order_id"],
+    }
+
+    machines = api["client"].get("/api/machines", headers=api["admin"]).json()
+    machine = next(m for m in machines if m["id"] == task["machine_id"])
+    assert (machine["status"], machine["current_task_id"]) == ("pause", task["id"])
+
+
+def test_conflict_rejects_only_that_tasks_events(api, make_task, monkeypatch):
+    _, (stale, fresh) = make_task(10, 10)
+    write_work_log_plans = server.write_work_log_plans
+
+    async def concurrent_write(task_plans):
+        # Okumadan sonra başka bir tablet ilk görevi değiştirdi
+        await server.db.tasks.update_one({"id": stale["id"]}, {"$set": {"status": "paused"}})
+        return await write_work_log_plans(task_plans)
+    monkeypatch.setattr(server, "write_work_log_plans", concurrent_write)
+
+    response = post_batch(api, [
+        {"task_id": stale["id"], "event_type": "prep_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": fresh["id"], "event_type": "prep_start", "timestamp": "2026-01-05T08:05:00"},
+        {"task_id": stale["id"], "event_type": "prep_end", "timestamp": "2026-01-05T08:10:00"},
+    ])
+    assert (response["accepted"], response["rejected"]) == (1, 2)
+    assert [result["status"] for result in response["results"]] == ["rejected", "created", "rejected"]
+
+    client = api["client"]
+    assert client.get(f"/api/work-logs/task/{stale['id']}", headers=api["worker"]).json() == []
+    assert len(client.get(f"/api/work-logs/task/{fresh['id']}", headers=api["worker"]).json()) == 1
@@ -0,0 +1,36 @@
+def test_idempotent_replay_returns_first_response(api, make_task, post_log):
+    _, (task,) = make_task(10)
+    key = {"Idempotency-Key": "tablet-1-0001"}
+    first = post_log(task["id"], "prep_start", headers=key)
+    replay = post_log(task["id"], "prep_start", headers=key)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    logs = api["client"].get(f"/api/work-logs/task/{task['id']}", headers=api["worker"]).json()
+    assert len(logs) == 1
+
+
+def test_idempotency_key_reused_with_different_payload_is_rejected(api, make_task, post_log):
+    _, (task,) = make_task(10)
+    key = {"Idempotency-Key": "tablet-1-0002"}
+    assert post_log(task["id"], "prep_start", headers=key).status_code == 200
+    assert post_log(task["id"], "work_start", headers=key).status_code == 422
+
+
+def test_plan_from_stale_task_is_not_applied(api, make_task, post_log):
+    import server
+
+    _, (task,) = make_task(10)
+    portal = api["client"].portal
+    stale = portal.call(server.db.tasks.find_one, {"id": task["id"]})
+    assert post_log(task["id"], "prep_start").status_code == 200
+
+    # Başka bir tabletin eşzamanlı isteği eski görev durumuyla plan kurmuş
+    doc = server.WorkLog(
+        task_id=task["id"], event_type="work_start", worker_id="other", machine_id=stale["machine_id"]
+    ).model_dump()
+    conflicts = portal.call(server.write_work_log_plans, {task["id"]: server.plan_work_log_writes(stale, doc)})
+
+    assert conflicts == {task["id"]}
+    logs = api["client"].get(f"/api/work-logs/task/{task['id']}", headers=api["worker"]).json()
+    assert [log["event_type"] for log in logs] == ["prep_start"]
@@ -0,0 +1,73 @@
+def get_order(api, order_id):
+    orders = api["client"].get("/api/work-orders", headers=api["admin"]).json()
+    return next(order for order in orders if order["id"] == order_id)
+
+
+def run_to_completion(post_log, task_id, quantity):
+    for event_type in ("prep_start", "prep_end"):
+        assert post_log(task_id, event_type).status_code == 200
+    return post_log(task_id, "work_complete", quantity_completed=quantity)
+
+
+def test_work_order_completes_when_last_task_completes(api, make_task, post_log):
+    order, (first, second) = make_task(10, 10)
+    assert run_to_completion(post_log, first["id"], 10).status_code == 200
+    assert get_order(api, order["id"])["status"] != "completed"
+
+    assert run_to_completion(post_log, second["id"], 10).status_code == 200
+    completed = get_order(api, order["id"])
+    assert completed["status"] == "completed"
+    assert (completed["open_task_count"], completed["completed_task_count"], completed["completed_quantity"]) == (0, 2, 20)
+
+
+def test_partial_completion_opens_remainder_task(api, make_task, post_log):
+    order, (task,) = make_task(10)
+    assert run_to_completion(post_log, task["id"], 4).status_code == 200
+    current = get_order(api, order["id"])
+    assert current["status"] != "completed"
+    assert (current["open_task_count"], current["completed_task_count"], current["completed_quantity"]) == (1, 1, 4)
+
+
+def test_repeated_work_complete_does_not_change_counters(api, make_task, post_log):
+    order, (first, second) = make_task(10, 10)
+    assert run_to_completion(post_log, first["id"], 10).status_code == 200
+    # Tabletin yeniden denemesi
+    assert post_log(first["id"], "work_complete", quantity_completed=10).status_code == 409
+
+    current = get_order(api, order["id"])
+    assert current["status"] != "completed"
+    assert (current["open_task_count"], current["completed_task_count"]) == (1, 1)
+
+
+def test_deleting_last_open_task_completes_order(api, make_task, post_log):
+    order, (first, second) = make_task(10, 10)
+    assert run_to_completion(post_log, first["id"], 10).status_code == 200
+    assert api["client"].delete(f"/api/tasks/{second['id']}", headers=api["admin"]).status_code == 200
+
+    current = get_order(api, order["id"])
+    assert current["status"] == "completed"
+    assert current["open_task_count"] == 0
+
+
+def test_repeated_delete_decrements_open_count_once(api, make_task):
+    order, (first, second, third) = make_task(10, 10, 10)
+    client = api["client"]
+    assert client.delete(f"/api/tasks/{first['id']}", headers=api["admin"]).status_code == 200
+    assert client.delete(f"/api/tasks/{first['id']}", headers=api["admin"]).status_code == 404
+    assert get_order(api, order["id"])["open_task_count"] == 2
+
+
+def test_backfill_only_sets_missing_counters(api, make_task):
+    import server
+
+    (legacy, _), (partial, _) = make_task(10, 10), make_task(10)
+    portal = api["client"].portal
+    portal.call(server.db.work_orders.update_many, {}, {"$unset": {field: "" for field in server.WORK_ORDER_COUNTERS}})
+    # Başlangıç taraması sırasında canlı bir $inc sayaçlardan birini oluşturmuş
+    portal.call(server.db.work_orders.update_one, {"id": partial["id"]}, {"$set": {"open_task_count": 7}})
+
+    assert portal.call(server.backfill_work_order_counters) == 5
+    assert portal.call(server.backfill_work_order_counters) == 0
+    assert (get_order(api, legacy["id"])["open_task_count"], get_order(api, legacy["id"])["completed_quantity"]) == (2, 0)
+    current = get_order(api, partial["id"])
+    assert (current["open_task_count"], current["completed_task_count"], current["completed_quantity"]) == (7, 0, 0)
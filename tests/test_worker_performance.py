@@ -0,0 +1,75 @@
+import random
+from datetime import timedelta
+
+from server import WorkIntervalEngine, rollup_increments, task_state_after
+from tests.conftest import DAY_1, DAY_2, log
+
+
+def generate_logs(seed, tasks=30):
+    rng = random.Random(seed)
+    logs = []
+    for number in range(tasks):
+        clock = DAY_1 + timedelta(minutes=rng.randint(0, 3000))
+        task_id = f"t{number}"
+
+        def event(event_type, **fields):
+            nonlocal clock
+            clock += timedelta(minutes=rng.randint(1, 400))
+            logs.append(log(event_type, clock, task_id=task_id, **fields))
+
+        event("prep_start")
+        event("prep_end")
+        for _ in range(rng.randint(0, 3)):
+            event("work_pause", pause_reason=rng.choice(["break", "failure", None]))
+            event("work_resume")
+        event("work_complete", quantity_completed=rng.randint(1, 50))
+    return logs
+
+
+def test_engine_matches_incremental_updates():
+    logs = generate_logs(seed=7)
+    logs.sort(key=lambda doc: doc["timestamp"])
+
+    # Canlı yol: her olay görevin o anki durumuna göre $inc üretir
+    incremental = {}
+    tasks = {}
+    for doc in logs:
+        task = tasks.get(doc["task_id"], {"status": "assigned"})
+        for day, inc in rollup_increments(task, doc).items():
+            fields = incremental.setdefault((day, doc["machine_id"], doc["worker_id"]), {})
+            for field, value in inc.items():
+                fields[field] = fields.get(field, 0) + value
+        tasks[doc["task_id"]] = task_state_after(doc)
+
+    engine = WorkIntervalEngine()
+    for doc in sorted(logs, key=lambda doc: (doc["task_id"], doc["timestamp"])):
+        engine.feed(doc)
+
+    assert engine.events == len(logs)
+    assert engine.totals.keys() == incremental.keys()
+    for key, fields in incremental.items():
+        assert engine.totals[key].keys() == fields.keys()
+        for field, value in fields.items():
+            assert abs(engine.totals[key][field] - value) < 1e-6
+
+
+def test_engine_close_open_counts_running_phase():
+    engine = WorkIntervalEngine()
+    engine.feed(log("work_start", DAY_1 + timedelta(hours=23)))
+    engine.close_open(DAY_2 + timedelta(hours=2))
+    assert engine.totals[(DAY_1, "m1", "w1")]["work_minutes"] == 60.0
+    assert engine.totals[(DAY_2, "m1", "w1")]["work_minutes"] == 120.0
+
+
+def test_closed_range_counts_phase_left_open_overnight(api, make_task):
+    _, (task,) = make_task(10)
+    api["client"].post("/api/work-logs/batch", headers=api["worker"], json=[
+        {"task_id": task["id"], "event_type": "prep_start", "timestamp": "2026-01-05T08:00:00"},
+        {"task_id": task["id"], "event_type": "prep_end", "timestamp": "2026-01-05T08:30:00"},
+        {"task_id": task["id"], "event_type": "work_pause", "pause_reason": "break", "timestamp": "2026-01-05T22:00:00"},
+    ])
+    params = {"worker_id": api["worker_user"]["id"], "start_date": "2026-01-06", "end_date": "2026-01-06"}
+    summary = api["client"].get("/api/reports/worker-performance", headers=api["admin"], params=params).json()["summary"]
+    # Makine gece boyunca molada kaldı; kapalı gün raporu bu süreyi de sayar
+    assert summary["total_pause_time_minutes"] == 24 * 60
+    assert summary["pause_breakdown"]["break_minutes"] == 24 * 60